@@ -1,25 +1,1092 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import time
-import random
 import re
-from urllib.parse import quote_plus
+import os
+import atexit
+import base64
+import gzip
+import hashlib
+import threading
+import json
+import queue
+import socket
+import sqlite3
+import uuid
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import parse_qs, quote_plus, urlsplit
 import logging
 
+try:
+    import psutil
+except ImportError:  # memory-based recycling is skipped without psutil
+    psutil = None
+
+try:
+    import orjson
+except ImportError:  # responses fall back to the standard json encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered without brotli
+    brotli = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class UniversalEcommerceScraper:
+# Driver pool settings
+DRIVER_POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', 4))
+DRIVER_MAX_PAGES = int(os.environ.get('DRIVER_MAX_PAGES', 50))
+DRIVER_MAX_MEMORY_MB = int(os.environ.get('DRIVER_MAX_MEMORY_MB', 1500))
+DRIVER_POOL_BLOCKING = os.environ.get('DRIVER_POOL_BLOCKING', '1') == '1'
+DRIVER_CHECKOUT_TIMEOUT = float(os.environ.get('DRIVER_CHECKOUT_TIMEOUT', 60))
+
+# Requests the browser never makes: we only read DOM text and image src attributes.
+# Sites add patterns with "block": {"deny": [...]} and opt back in to defaults with "allow".
+BLOCK_RESOURCES = os.environ.get('BLOCK_RESOURCES', '1') == '1'
+BLOCK_IMAGES = os.environ.get('BLOCK_IMAGES', '1') == '1'  # also turns off image decoding
+IMAGE_URL_PATTERNS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico']
+BLOCKED_URL_PATTERNS = [
+    # Fonts and media
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    # Third-party analytics, ads and session recording
+    '*google-analytics.com*', '*googletagmanager.com*', '*googlesyndication.com*',
+    '*doubleclick.net*', '*googleadservices.com*', '*connect.facebook.net*',
+    '*hotjar.com*', '*clarity.ms*', '*criteo.com*', '*criteo.net*', '*taboola.com*',
+    '*outbrain.com*', '*scorecardresearch.com*', '*amazon-adsystem.com*', '*moengage.com*',
+    '*webengage.com*', '*clevertap*', '*branch.io*', '*appsflyer.com*', '*newrelic.com*',
+    '*nr-data.net*', '*sentry.io*', '*segment.io*', '*mixpanel.com*',
+]
+
+# Site definitions, one JSON file per site; edits are picked up without a restart
+SITES_DIR = os.environ.get('SITES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sites'))
+SITES_RELOAD_INTERVAL = float(os.environ.get('SITES_RELOAD_INTERVAL', 2))
+SITE_TIMEOUT = float(os.environ.get('SITE_TIMEOUT', 45))
+
+# Per-site circuit breaker: after BREAKER_THRESHOLD empty or failed scrapes in a row a site
+# is skipped (served from cache where possible) for BREAKER_COOLDOWN seconds, then a single
+# probe search decides whether it closes again.
+BREAKER_THRESHOLD = int(os.environ.get('BREAKER_THRESHOLD', 3))
+BREAKER_COOLDOWN = float(os.environ.get('BREAKER_COOLDOWN', 300))
+HEALTH_WINDOW = 20  # recent scrapes kept per site for success rates and budgets
+
+# A site's timeout budget shrinks towards BUDGET_FACTOR times its slowest recent
+# successful scrape, never below BUDGET_MIN or above the site's configured timeout.
+BUDGET_FACTOR = float(os.environ.get('BUDGET_FACTOR', 2))
+BUDGET_MIN = float(os.environ.get('BUDGET_MIN', 15))
+BUDGET_MIN_SAMPLES = 5
+
+# Sites with "fetch": "http" are tried over plain HTTP first; the browser is only used
+# when the static parse extracts fewer than HTTP_MIN_PRODUCTS product cards, i.e. the page
+# needs JavaScript. Few relevant products on a well-parsed page is a narrow query, not a failure.
+HTTP_MIN_PRODUCTS = int(os.environ.get('HTTP_MIN_PRODUCTS', 3))
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Where each field lives inside a product card, plus the per-site rules build_products applies.
+# Every field lists fallback selectors in priority order; rules a site file leaves out use these defaults.
+CARD_FIELDS = ('title', 'link', 'price', 'rating', 'image')
+CARD_DEFAULTS = {
+    'min_containers': 1,
+    'max_cards': 15,
+    'link': [],
+    'rating': [],
+    'image': ["img"],
+    'title_min_length': 0,
+    'title_is_link': False,
+    'url_patterns': [],
+    'price_pattern': r'\d',
+    'price_from_text': False,
+    'rating_needs_digit': False,
+}
+
+# How long to wait for a site's cards to render and how far to scroll for more.
+# Scrolling stops at the site's max_cards, once a scroll adds nothing within
+# settle_time seconds, or after max_wait seconds in total.
+WAIT_POLL_INTERVAL = 0.25
+WAIT_DEFAULTS = {'ready_timeout': 10, 'scroll_step': 1000, 'max_scrolls': 3, 'settle_time': 2, 'max_wait': 15}
+
+# Runs in the page: counts cards using the first container selector with enough matches
+COUNT_CARDS_JS = """
+const config = arguments[0];
+for (const selector of config.containers) {
+    let count = 0;
+    try { count = document.querySelectorAll(selector).length; } catch (e) { continue; }
+    if (count >= config.min_containers) { return count; }
+}
+return 0;
+"""
+
+# Runs in the page: collects every card's field candidates in one WebDriver round-trip
+EXTRACT_CARDS_JS = """
+const config = arguments[0];
+let containers = [];
+for (const selector of config.containers) {
+    let found = [];
+    try { found = Array.from(document.querySelectorAll(selector)); } catch (e) { continue; }
+    if (found.length >= config.min_containers) { containers = found; break; }
+}
+const read = (el) => ({
+    text: (el.innerText || '').trim() || (el.getAttribute('title') || '').trim() || (el.textContent || '').trim(),
+    href: el.href || el.getAttribute('href') || null,
+    src: el.getAttribute('src') ? el.src : (el.getAttribute('data-src') || null)
+});
+const collect = (card, selectors) => {
+    const out = [];
+    for (const selector of selectors) {
+        let el = null;
+        try { el = card.querySelector(selector); } catch (e) { continue; }
+        if (el) out.push(read(el));
+    }
+    return out;
+};
+return containers.slice(0, config.max_cards).map((card) => ({
+    title: collect(card, config.title),
+    link: collect(card, config.link),
+    price: collect(card, config.price),
+    rating: collect(card, config.rating),
+    image: collect(card, config.image),
+    text: config.price_from_text ? card.innerText : null
+}));
+"""
+
+# Runs in the page: bytes fetched and load time from the Performance API. Cross-origin
+# resources without Timing-Allow-Origin report 0 bytes, so this is a lower bound.
+PAGE_STATS_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const entry of resources) { bytes += entry.transferSize || 0; }
+return {
+    bytes: bytes,
+    requests: resources.length + 1,
+    load_ms: nav ? Math.round(nav.loadEventEnd || nav.domContentLoadedEventEnd || nav.duration) : null
+};
+"""
+
+# Result cache settings
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+CACHE_PATH = os.environ.get('CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_cache.db'))
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 600))
+CACHE_STALE_TTL = float(os.environ.get('CACHE_STALE_TTL', 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 500))
+
+# Longest a request waits on a shared in-flight search, in seconds
+SEARCH_WAIT_TIMEOUT = float(os.environ.get('SEARCH_WAIT_TIMEOUT', 90))
+
+# Background job queue settings
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_MAX = int(os.environ.get('JOB_QUEUE_MAX', 50))
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 3600))
+JOB_DEFAULT_PRIORITY = 5  # lower runs sooner, 0-9
+JOB_DRIVER_POOL_SIZE = int(os.environ.get('JOB_DRIVER_POOL_SIZE', JOB_WORKERS * 2))  # browsers owned by job workers
+
+# Scraper workers: with SCRAPE_BACKEND=workers the API never opens a browser. Each site scrape
+# is queued in WORKER_DB_PATH for the least-loaded `python worker.py` process to run.
+SCRAPE_BACKEND = os.environ.get('SCRAPE_BACKEND', 'local')  # 'local' or 'workers'
+WORKER_DB_PATH = os.environ.get('WORKER_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workers.db'))
+WORKER_HEARTBEAT = float(os.environ.get('WORKER_HEARTBEAT', 2))
+WORKER_TTL = float(os.environ.get('WORKER_TTL', 10))  # a worker silent this long is presumed dead
+WORKER_POLL_INTERVAL = 0.1
+WORKER_TASK_RETENTION = 600  # finished tasks are deleted after this many seconds
+
+# Pre-warming: the most searched queries are re-scraped in the background before their
+# cache entries expire on the job workers' browsers, PREWARM_CONCURRENCY at a time and at most PREWARM_RATE per minute
+PREWARM_ENABLED = os.environ.get('PREWARM_ENABLED', '1') == '1'
+PREWARM_TOP_N = int(os.environ.get('PREWARM_TOP_N', 20))
+PREWARM_INTERVAL = float(os.environ.get('PREWARM_INTERVAL', 300))
+PREWARM_CONCURRENCY = int(os.environ.get('PREWARM_CONCURRENCY', 1))
+PREWARM_RATE = float(os.environ.get('PREWARM_RATE', 6))
+PREWARM_HALF_LIFE = float(os.environ.get('PREWARM_HALF_LIFE', 6 * 3600))  # how fast old searches stop counting
+PREWARM_TRACKED = 5000  # most distinct queries whose counts are kept
+
+# Category and relevance keyword definitions
+CATEGORIES_PATH = os.environ.get('CATEGORIES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'categories.json'))
+
+# Deep mode: further result pages per site, fetched on request and continued with a cursor.
+# A site stops early once a page adds nothing cheaper than its DEEP_TOP_K cheapest products.
+DEEP_MAX_PAGES = int(os.environ.get('DEEP_MAX_PAGES', 3))  # pages per site per request
+DEEP_MAX_CARDS = int(os.environ.get('DEEP_MAX_CARDS', 120))  # products per site per request
+DEEP_PAGE_LIMIT = int(os.environ.get('DEEP_PAGE_LIMIT', 10))  # deepest page ever fetched
+DEEP_TOP_K = 10
+
+# Server-side views of a result set: filters, sort order and page size
+RESULT_SORTS = ('price-asc', 'price-desc')
+RESULT_MAX_LIMIT = int(os.environ.get('RESULT_MAX_LIMIT', 100))
+RESULT_PAGE_SIZE = 24
+RESULT_INDEX_ENTRIES = 64  # indexed result sets kept in memory
+
+# Response encoding: product fields clients can project onto, strings dictionary-encoded in the
+# columnar layout, and compression for clients that send Accept-Encoding
+PRODUCT_FIELDS = ('id', 'title', 'price', 'price_num', 'rating', 'category', 'source', 'url', 'image')
+PRODUCT_LAYOUTS = ('rows', 'columns')
+DICTIONARY_FIELDS = ('source', 'category')
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') == '1'  # off when a proxy compresses
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Result snapshots: recent versions of each search's products, so pollers only fetch what changed
+SNAPSHOT_SEARCHES = int(os.environ.get('SNAPSHOT_SEARCHES', 256))
+SNAPSHOT_VERSIONS = int(os.environ.get('SNAPSHOT_VERSIONS', 8))  # versions per search a client can diff against
+URL_ID_PARAMS = ('pid', 'sku', 'productId')  # query parameters that identify a product rather than a click
+
+# Price history store settings
+HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', '1') == '1'
+HISTORY_PATH = os.environ.get('HISTORY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_history.db'))
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 200))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 2))
+
+# Words ignored when matching titles and building cache keys
+STOP_WORDS = {'for', 'the', 'a', 'an', 'in', 'on', 'at', 'to', 'and', 'or', 'with'}
+
+
+def normalize_query(query):
+    """Lowercase a query, collapse whitespace and drop stop words"""
+    words = [word for word in query.lower().split() if word not in STOP_WORDS]
+    return ' '.join(words) or ' '.join(query.lower().split())
+
+
+class MetricsRegistry:
+    """Counters, histograms and gauges rendered in the Prometheus text exposition format"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._values = {}
+        self._buckets = {}
+        self._gauges = {}
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text)
+        self._values[name] = {}
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = ('histogram', help_text)
+        self._values[name] = {}
+        self._buckets[name] = buckets
+
+    def gauge(self, name, help_text, read):
+        """Register a gauge whose samples come from read(), a callable returning {label pairs tuple: value}"""
+        self._meta[name] = ('gauge', help_text)
+        self._gauges[name] = read
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        buckets = self._buckets[name]
+        with self._lock:
+            series = self._values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        lines = []
+        with self._lock:
+            snapshot = {name: dict(series) for name, series in self._values.items()}
+        for name, (kind, help_text) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for key, value in snapshot[name].items():
+                    lines.append(f"{name}{self._labels(key)} {value}")
+            elif kind == 'histogram':
+                for key, (counts, total, count) in snapshot[name].items():
+                    for bound, bucket_count in zip(self._buckets[name], counts):
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', bound),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{self._labels(key + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{self._labels(key)} {total}")
+                    lines.append(f"{name}_count{self._labels(key)} {count}")
+            else:
+                try:
+                    samples = self._gauges[name]()
+                except Exception:
+                    samples = {}
+                for key, value in samples.items():
+                    lines.append(f"{name}{self._labels(key)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.histogram('pricewise_span_seconds', 'Time spent in each phase of a search, by site')
+metrics.histogram('pricewise_request_seconds', 'HTTP request latency by endpoint')
+metrics.counter('pricewise_requests_total', 'HTTP requests by endpoint and status code')
+metrics.counter('pricewise_site_scrapes_total', 'Site scrapes by outcome')
+metrics.counter('pricewise_cards_found_total', 'Product cards extracted from result pages')
+metrics.counter('pricewise_products_dropped_total', 'Products discarded, by reason')
+metrics.counter('pricewise_products_returned_total', 'Products returned after filtering')
+metrics.counter('pricewise_cache_lookups_total', 'Result cache lookups by outcome')
+metrics.counter('pricewise_prewarm_total', 'Background pre-warm searches by outcome')
+metrics.histogram('pricewise_page_transfer_bytes', 'Bytes a browser page load transferred, by site',
+                  buckets=(50000, 100000, 250000, 500000, 1000000, 2500000, 5000000, 10000000, 25000000))
+metrics.histogram('pricewise_response_bytes', 'JSON response body size as sent, by endpoint and encoding',
+                  buckets=(1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000))
+
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordMatcher:
+    """Whole-word keyword lookup over a token list, built once from (keyword, value) pairs.
+
+    Each title token is a single dict lookup instead of one substring scan per keyword.
+    A plural suffix is accepted on the last word ('phone' matches 'phones' but not 'headphone').
+    When a keyword is listed more than once, the first value wins.
+    """
+
+    def __init__(self, pairs):
+        self._single = {}
+        self._multi = {}
+        for keyword, value in pairs:
+            words = tokenize(keyword)
+            if not words:
+                continue
+            last_forms = (words[-1], words[-1] + 's', words[-1] + 'es')
+            if len(words) == 1:
+                for form in last_forms:
+                    self._single.setdefault(form, value)
+            else:
+                forms = {tuple(words[1:-1]) + (form,) for form in last_forms}
+                self._multi.setdefault(words[0], []).append((len(words) - 1, forms, value))
+
+    def find_all(self, tokens):
+        """Return the value of every keyword found in tokens, in title order"""
+        single = self._single
+        multi = self._multi
+        found = []
+        for i, token in enumerate(tokens):
+            value = single.get(token)
+            if value is not None:
+                found.append(value)
+            if token in multi:
+                for length, forms, value in multi[token]:
+                    if tuple(tokens[i + 1:i + 1 + length]) in forms:
+                        found.append(value)
+        return found
+
+    def any_match(self, tokens):
+        return bool(self.find_all(tokens))
+
+
+class ProductClassifier:
+    """Categorizes titles and scores their relevance with keyword tables compiled once"""
+
+    def __init__(self, categories, main_device_keywords, accessory_keywords,
+                 default_category="General Products"):
+        self.default_category = default_category
+        self.category_names = [name for name, _ in categories]
+        # Category index is its priority: lower wins when a title matches several
+        self.category_matcher = KeywordMatcher(
+            (keyword, index) for index, (_, keywords) in enumerate(categories) for keyword in keywords
+        )
+        # Matched as substrings of the query, so run-together terms like 'smartphone' or 'iphone15' count
+        self.main_device_keywords = tuple(keyword.lower() for keyword in main_device_keywords)
+        self.accessory_matcher = KeywordMatcher((keyword, True) for keyword in accessory_keywords)
+        self._query_terms = lru_cache(maxsize=1024)(self._compile_query)
+
+    @classmethod
+    def from_file(cls, path=CATEGORIES_PATH):
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(
+            [(c['name'], c['keywords']) for c in config['categories']],
+            config['main_device_keywords'],
+            config['accessory_keywords'],
+            config.get('default_category', "General Products"),
+        )
+
+    def _compile_query(self, search_query):
+        query_lower = search_query.lower()
+        words = tuple(word for word in query_lower.split() if len(word) > 2 and word not in STOP_WORDS)
+        return words, any(keyword in query_lower for keyword in self.main_device_keywords)
+
+    def _score(self, title_lower, tokens, query_words, is_device_query):
+        if not query_words:
+            return 0.0
+        # Filter out accessories when searching for main devices
+        if is_device_query and self.accessory_matcher.any_match(tokens):
+            return 0.0
+        return sum(1 for word in query_words if word in title_lower) / len(query_words)
+
+    def categorize(self, title):
+        """Return the highest-priority category whose keywords appear in title"""
+        return self._category_for(tokenize(title))
+
+    def _category_for(self, tokens):
+        matches = self.category_matcher.find_all(tokens)
+        return self.category_names[min(matches)] if matches else self.default_category
+
+    def relevance_score(self, title, search_query):
+        """Fraction of meaningful query words found in title, or 0 for accessories of a device query"""
+        if not title or len(title) < 3:
+            return 0.0
+        title_lower = title.lower()
+        query_words, is_device_query = self._query_terms(search_query)
+        return self._score(title_lower, tokenize(title_lower), query_words, is_device_query)
+
+    def is_relevant(self, title, search_query):
+        return self.relevance_score(title, search_query) >= 0.5
+
+    def classify_many(self, titles, search_query):
+        """Return (category, relevance score) for every title, tokenizing each title once"""
+        query_words, is_device_query = self._query_terms(search_query)
+        results = []
+        for title in titles:
+            title_lower = (title or '').lower()
+            tokens = _TOKEN_RE.findall(title_lower)
+            score = self._score(title_lower, tokens, query_words, is_device_query) if len(title_lower) >= 3 else 0.0
+            results.append((self._category_for(tokens), score))
+        return results
+
+    def categorize_many(self, titles):
+        return [self._category_for(tokenize(title)) for title in titles]
+
+
+product_classifier = ProductClassifier.from_file()
+
+
+# Vocabulary used to match the same product across sites
+MATCH_BRANDS = {
+    'apple', 'samsung', 'oneplus', 'google', 'xiaomi', 'realme', 'vivo', 'oppo', 'motorola', 'nokia',
+    'iqoo', 'poco', 'nothing', 'sony', 'lg', 'boat', 'jbl', 'bose', 'lenovo', 'hp', 'dell', 'asus',
+    'acer', 'msi', 'tcl', 'mi', 'philips', 'canon', 'nikon', 'fujifilm', 'puma', 'nike', 'adidas',
+    'prestige', 'bajaj', 'havells', 'noise', 'fire-boltt', 'amazfit', 'redmi',
+}
+BRAND_ALIASES = {
+    'iphone': 'apple', 'ipad': 'apple', 'macbook': 'apple', 'airpods': 'apple',
+    'galaxy': 'samsung', 'pixel': 'google', 'redmi': 'xiaomi', 'mi': 'xiaomi',
+    'ideapad': 'lenovo', 'thinkpad': 'lenovo', 'pavilion': 'hp', 'vivobook': 'asus',
+    'playstation': 'sony', 'bravia': 'sony',
+}
+VARIANT_WORDS = {'pro', 'max', 'plus', 'ultra', 'mini', 'lite', 'fe', 'ce', 'neo', 'prime', 'air', 'fold', 'flip'}
+COLOR_WORDS = {
+    'black', 'white', 'blue', 'green', 'red', 'pink', 'yellow', 'purple', 'grey', 'gray', 'silver',
+    'gold', 'graphite', 'midnight', 'starlight', 'titanium', 'natural', 'cream', 'violet', 'orange',
+    'lavender', 'mint', 'phantom', 'onyx', 'obsidian', 'porcelain', 'space', 'rose', 'jet', 'deep',
+}
+MATCH_NOISE_WORDS = STOP_WORDS | COLOR_WORDS | {
+    'gb', 'tb', 'ram', 'rom', 'storage', 'new', 'latest', 'edition', '5g', '4g', 'dual', 'sim',
+    'smartphone', 'mobile', 'phone', 'inch', 'cm', 'pack', 'of', 'by',
+}
+MATCH_SIMILARITY = float(os.environ.get('MATCH_SIMILARITY', 0.5))
+_STORAGE_RE = re.compile(r'(\d+)\s*(gb|tb)\b')
+
+
+def product_key(title):
+    """Normalized title used to group observations of the same product over time"""
+    return ' '.join(token for token in tokenize(title) if token not in STOP_WORDS)
+
+
+class DriverPoolExhausted(Exception):
+    """Raised when no driver can be checked out of the pool"""
+
+
+class SearchTimeout(Exception):
+    """Raised when a caller gives up waiting on an in-flight search"""
+
+
+class JobQueueFull(Exception):
+    """Raised when the background job queue has no room for another search"""
+
+
+class UnknownSite(ValueError):
+    """Raised when a request names a site the registry doesn't have"""
+
+
+class PooledDriver:
+    """A Chrome driver owned by a DriverPool plus its usage counters"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def memory_mb(self):
+        """Resident memory of chromedriver and its browser processes, in MB"""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except Exception:
+            return None
+
+
+class DriverPool:
+    """Bounded, thread-safe pool of pre-launched Chrome drivers"""
+
+    def __init__(self, factory, size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES,
+                 max_memory_mb=DRIVER_MAX_MEMORY_MB, blocking=DRIVER_POOL_BLOCKING,
+                 timeout=DRIVER_CHECKOUT_TIMEOUT):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.blocking = blocking
+        self.timeout = timeout
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _launch(self):
+        return PooledDriver(self.factory())
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def is_healthy(self, pooled):
+        """Check that the browser still answers WebDriver commands"""
+        try:
+            pooled.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def needs_recycle(self, pooled):
+        """Check whether a driver has served too many pages or grown too large"""
+        if self.max_pages and pooled.pages >= self.max_pages:
+            return True
+        if self.max_memory_mb:
+            memory = pooled.memory_mb()
+            if memory is not None and memory >= self.max_memory_mb:
+                return True
+        return False
+
+    def warm(self):
+        """Pre-launch drivers until the pool is full"""
+        logger.info(f"🔥 Warming driver pool ({self.size} browsers)...")
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    break
+                self._total += 1
+            try:
+                pooled = self._launch()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def checkout(self, timeout=None):
+        """Take a healthy driver from the pool, launching one if there is room"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise DriverPoolExhausted("Driver pool is shut down")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        launch = False
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        pooled = None
+                        launch = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if not self.blocking or remaining <= 0:
+                        raise DriverPoolExhausted("No browser available, try again shortly")
+                    self._cond.wait(remaining)
+
+            if launch:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+
+            if self.is_healthy(pooled):
+                return pooled
+
+            logger.warning("⚠️ Discarding unhealthy browser from pool")
+            self._discard(pooled)
+
+    def checkin(self, pooled, broken=False):
+        """Return a driver to the pool, recycling it if it is worn out"""
+        if broken or self.needs_recycle(pooled):
+            logger.info(f"♻️ Recycling browser after {pooled.pages} pages")
+            self._discard(pooled)
+            return
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                close = True
+            else:
+                self._idle.append(pooled)
+                close = False
+            self._cond.notify()
+        if close:
+            self._quit(pooled)
+
+    def _discard(self, pooled):
+        self._quit(pooled)
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Context manager that checks a driver out and always checks it back in"""
+        pooled = self.checkout(timeout)
+        broken = False
+        try:
+            yield pooled
+        except Exception:
+            broken = not self.is_healthy(pooled)
+            raise
+        finally:
+            self.checkin(pooled, broken=broken)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'total': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+            }
+
+    def shutdown(self):
+        """Quit every idle driver and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+class SiteAdapter:
+    """One site's search URL, card selectors and wait policy, read from its definition file"""
+
+    REQUIRED = ('name', 'search_url', 'cards')
+    REQUIRED_CARDS = ('containers', 'title', 'price')
+
+    def __init__(self, definition, path=None):
+        source = path or 'site definition'
+        missing = [key for key in self.REQUIRED if key not in definition]
+        missing += [f"cards.{key}" for key in self.REQUIRED_CARDS if key not in definition.get('cards', {})]
+        if missing:
+            raise ValueError(f"{source} is missing {', '.join(missing)}")
+        if '{query}' not in definition['search_url']:
+            raise ValueError(f"{source}: search_url has no {{query}} placeholder")
+        if definition.get('fetch', 'browser') not in ('http', 'browser'):
+            raise ValueError(f"{source}: fetch must be 'http' or 'browser'")
+        if 'page_url' in definition and not all(f in definition['page_url'] for f in ('{query}', '{page}')):
+            raise ValueError(f"{source}: page_url needs {{query}} and {{page}} placeholders")
+        
+        self.name = definition['name']
+        self.path = path
+        self.icon = definition.get('icon', '🌐')
+        self.order = definition.get('order', 100)
+        self.enabled = definition.get('enabled', True)
+        self.url_template = definition['search_url']
+        self.fetch = definition.get('fetch', 'browser')
+        self.timeout = float(definition.get('timeout', SITE_TIMEOUT))
+        self.page_template = definition.get('page_url')
+        # Static pages are cheap to fetch side by side; browser pages each hold a pooled driver
+        self.parallel_pages = max(1, int(definition.get('parallel_pages', 3 if self.fetch == 'http' else 1)))
+        
+        parts = urlsplit(self.url_template)
+        self.cards = {**CARD_DEFAULTS, 'base_url': f"{parts.scheme}://{parts.netloc}", **definition['cards']}
+        self.wait = {**WAIT_DEFAULTS, **definition.get('wait', {})}
+        
+        block = definition.get('block', {})
+        defaults = BLOCKED_URL_PATTERNS + (IMAGE_URL_PATTERNS if BLOCK_IMAGES else [])
+        allowed = set(block.get('allow', []))
+        self.blocked_urls = [p for p in defaults if p not in allowed] + list(block.get('deny', []))
+
+    def search_url(self, query):
+        return self.url_template.format(query=quote_plus(query))
+
+    def page_url(self, query, page):
+        """URL of a result page; page 1 is the plain search URL"""
+        if page <= 1 or not self.page_template:
+            return self.search_url(query)
+        return self.page_template.format(query=quote_plus(query), page=page)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'icon': self.icon,
+            'enabled': self.enabled,
+            'fetch': self.fetch,
+            'timeout': self.timeout,
+            'search_url': self.url_template,
+            'paginated': bool(self.page_template),
+        }
+
+
+class SiteRegistry:
+    """Site adapters loaded from a directory of JSON definitions and reloaded when the files change"""
+
+    def __init__(self, directory=SITES_DIR, reload_interval=SITES_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._files = {}  # path -> (mtime, adapter)
+        self._adapters = {}
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _scan(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError as e:
+            logger.error(f"Error reading site definitions from {self.directory}: {e}")
+            return {}
+        files = {}
+        for name in sorted(names):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    files[path] = os.path.getmtime(path)
+                except OSError:
+                    continue
+        return files
+
+    def reload(self):
+        """Load new and changed definitions; a broken file keeps its last good version"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            loaded = {}
+            for path, mtime in self._scan().items():
+                previous = self._files.get(path)
+                if previous and previous[0] == mtime:
+                    loaded[path] = previous
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        adapter = SiteAdapter(json.load(f), path)
+                    loaded[path] = (mtime, adapter)
+                    logger.info(f"🧩 Loaded site {adapter.name} from {os.path.basename(path)}")
+                except (OSError, ValueError, TypeError, AttributeError) as e:
+                    logger.error(f"Invalid site definition {path}: {e}")
+                    if previous:
+                        loaded[path] = (mtime, previous[1])
+        
+            adapters = {}
+            for path, (_, adapter) in loaded.items():
+                key = adapter.name.lower()
+                if key in adapters:
+                    logger.warning(f"Site {adapter.name} is defined twice, using {os.path.basename(path)}")
+                adapters[key] = adapter
+            self._files = loaded
+            self._adapters = adapters
+
+    def _refresh(self):
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def all(self):
+        """Enabled sites in display order"""
+        self._refresh()
+        adapters = [a for a in self._adapters.values() if a.enabled]
+        return sorted(adapters, key=lambda a: (a.order, a.name))
+
+    def select(self, names=None):
+        """Enabled sites named in names (case-insensitive), or every enabled site when names is empty"""
+        adapters = self.all()
+        if not names:
+            return adapters
+        wanted = {name.strip().lower() for name in names}
+        unknown = wanted - {a.name.lower() for a in adapters}
+        if unknown:
+            raise UnknownSite(f"Unknown site: {', '.join(sorted(unknown))}")
+        return [a for a in adapters if a.name.lower() in wanted]
+
+
+site_registry = SiteRegistry()
+
+
+def search_key(query, sites=None):
+    """Cache and single-flight key for a query, scoped to a site subset when one was requested"""
+    key = normalize_query(query)
+    if sites:
+        key += '|' + ','.join(sorted(a.name.lower() for a in sites))
+    return key
+
+
+def encode_cursor(query, state, sites=None):
+    """Opaque token naming the next result page of each site in state, or None when none are left"""
+    if not state:
+        return None
+    data = {'q': query, 's': state}
+    if sites:
+        # The site subset the search was scoped to, so its cached result is the one deeper pages merge into
+        data['f'] = sorted(a.name for a in sites)
+    payload = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (query, state, sites) from a cursor token; raises ValueError if it is malformed"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        query = data['q'].strip()
+        state = {}
+        for site, entry in data['s'].items():
+            page = int(entry['page'])
+            if not 2 <= page <= DEEP_PAGE_LIMIT:
+                raise ValueError(f"page {page} out of range")
+            state[site] = {'page': page, 'top': [int(p) for p in entry.get('top', [])][:DEEP_TOP_K]}
+        names = data.get('f')
+        sites = site_registry.select([str(name) for name in names]) if names else None
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not query:
+        raise ValueError("Invalid cursor: no query")
+    return query, state, sites
+
+
+class SiteHealth:
+    """Recent outcomes per site, with a circuit breaker and an adaptive timeout budget"""
+
+    FAILURES = ('empty', 'error', 'timeout')
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, window=HEALTH_WINDOW):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.window = window
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def _site(self, site):
+        state = self._sites.get(site)
+        if state is None:
+            state = {
+                'state': 'closed',
+                'failures': 0,
+                'opened_at': None,
+                'probing': False,
+                'outcomes': deque(maxlen=self.window),
+                'durations': deque(maxlen=self.window),
+            }
+            self._sites[site] = state
+        return state
+
+    def allow(self, site):
+        """Whether site should be scraped now; lets one probe through once the cooldown ends"""
+        with self._lock:
+            state = self._site(site)
+            if state['state'] == 'closed':
+                return True
+            if state['state'] == 'open' and time.time() - state['opened_at'] >= self.cooldown:
+                state['state'] = 'half_open'
+            if state['state'] == 'half_open' and not state['probing']:
+                state['probing'] = True
+                logger.info(f"🩺 Probing {site} after {self.cooldown:.0f}s cooldown")
+                return True
+            return False
+
+    def record(self, site, status, elapsed=None, fetch=None):
+        """Update a site's breaker with the outcome of one scrape"""
+        with self._lock:
+            state = self._site(site)
+            state['probing'] = False
+            if status == 'ok':
+                if state['state'] != 'closed':
+                    logger.info(f"✅ {site} recovered, closing its circuit")
+                state.update({'state': 'closed', 'failures': 0, 'opened_at': None})
+                state['outcomes'].append(True)
+                # Only browser scrapes set the budget; a fast static fetch says nothing about the fallback
+                if elapsed is not None and fetch == 'browser':
+                    state['durations'].append(elapsed)
+            elif status in self.FAILURES:
+                state['failures'] += 1
+                state['outcomes'].append(False)
+                if state['state'] == 'half_open' or state['failures'] >= self.threshold:
+                    if state['state'] != 'open':
+                        logger.warning(f"🚫 Opening circuit for {site} after {state['failures']} failed scrapes")
+                    state.update({'state': 'open', 'opened_at': time.time()})
+
+    def release(self, site):
+        """Give up a probe whose outcome will never be recorded, so a later search can probe again"""
+        with self._lock:
+            self._site(site)['probing'] = False
+
+    def budget(self, adapter):
+        """Timeout for the next scrape of adapter's site, tightened by its recent successes"""
+        with self._lock:
+            durations = list(self._site(adapter.name)['durations'])
+        if len(durations) < BUDGET_MIN_SAMPLES:
+            return adapter.timeout
+        return min(adapter.timeout, max(BUDGET_MIN, max(durations) * BUDGET_FACTOR))
+
+    def stats(self):
+        with self._lock:
+            stats = {}
+            for site, state in self._sites.items():
+                outcomes = state['outcomes']
+                stats[site] = {
+                    'state': state['state'],
+                    'consecutive_failures': state['failures'],
+                    'success_rate': round(sum(outcomes) / len(outcomes), 3) if outcomes else None,
+                    'recent_scrapes': len(outcomes),
+                    'opened_at': state['opened_at'],
+                    'retry_in': max(0, round(state['opened_at'] + self.cooldown - time.time(), 1)) if state['state'] == 'open' else 0,
+                }
+            return stats
+
+
+def create_http_session():
+    """Create a keep-alive session shared by all static page fetches"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=16, max_retries=1)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-IN,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate',
+    })
+    return session
+
+
+http_session = create_http_session()
+
+
+def absolute_url(url, base_url):
+    return f"{base_url}{url}" if url.startswith('/') and not url.startswith('//') else url
+
+
+def canonical_url(url):
+    """Host and path of a product URL without tracking parameters, ref segments or ad redirects"""
+    parts = urlsplit(url)
+    params = parse_qs(parts.query)
+    target = params.get('url', [''])[0]
+    if target.startswith('/') and not target.startswith('//'):
+        return canonical_url(f"{parts.scheme}://{parts.netloc}{target}")
+    path = re.sub(r'/ref=[^/]*$', '', parts.path).rstrip('/')
+    ids = '&'.join(f"{name}={params[name][0]}" for name in URL_ID_PARAMS if name in params)
+    return f"{parts.netloc.lower()}{path}" + (f"?{ids}" if ids else '')
+
+
+def product_fingerprint(source, url, title=''):
+    """Stable id for a listing: its site plus canonical URL, or its title when it has no product URL"""
+    basis = canonical_url(url) if url else ' '.join(title.lower().split())
+    return hashlib.sha1(f"{source}|{basis}".encode()).hexdigest()[:16]
+
+
+def _read_soup_element(element):
+    text = element.get_text(' ', strip=True) or (element.get('title') or '').strip()
+    return {
+        'text': text,
+        'href': element.get('href'),
+        'src': element.get('src') or element.get('data-src'),
+    }
+
+
+def extract_cards_html(html, config):
+    """Read product cards from static HTML into the same shape EXTRACT_CARDS_JS returns"""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    containers = []
+    for selector in config['containers']:
+        elements = soup.select(selector)
+        if len(elements) >= config['min_containers']:
+            containers = elements
+            break
+    
+    cards = []
+    for container in containers[:config['max_cards']]:
+        card = {}
+        for field in CARD_FIELDS:
+            card[field] = []
+            for selector in config[field]:
+                element = container.select_one(selector)
+                if element is not None:
+                    card[field].append(_read_soup_element(element))
+        card['text'] = container.get_text(' ', strip=True) if config['price_from_text'] else None
+        cards.append(card)
+    return cards
+
+
+class UniversalEcommerceScraper:
+    def __init__(self, driver_pool=None, price_history=None, timings=None, site_health=None, fallback=None,
+                 broker=None):
         self.driver = None
+        self.driver_pool = driver_pool
+        self.broker = broker  # WorkerBroker that runs site scrapes in scraper worker processes
+        self.price_history = price_history
+        self.site_health = site_health
+        self.fallback = fallback  # (adapter, query) -> cached products for sites that are skipped
+        self.timings = timings
+        self.lease = None
+        self.site_reports = {}
+        self.page_stats = None
+        self.progress = None  # SearchProgress that each site's products are published to
+
+    def record_span(self, name, seconds, site=None):
+        """Record a timed phase in the metrics and in this search's timing breakdown"""
+        metrics.observe('pricewise_span_seconds', seconds, span=name, site=site or 'all')
+        if self.timings is not None:
+            self.timings.append({'span': name, 'site': site, 'seconds': round(seconds, 4)})
+
+    @contextmanager
+    def span(self, name, site=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, time.perf_counter() - start, site)
 
     def create_driver(self):
         """Create and configure Chrome driver"""
+        start = time.perf_counter()
         try:
             options = uc.ChromeOptions()
             options.add_argument("--headless=new")
@@ -28,13 +1095,46 @@ class UniversalEcommerceScraper:
             options.add_argument("--disable-gpu")
             options.add_argument("--window-size=1920,1080")
             options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+            options.add_argument(f"--user-agent={USER_AGENT}")
+            if BLOCK_IMAGES:
+                options.add_argument("--blink-settings=imagesEnabled=false")
             self.driver = uc.Chrome(options=options)
+            if BLOCK_RESOURCES:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+            self.record_span('driver_start', time.perf_counter() - start)
             return self.driver
         except Exception as e:
             logger.error(f"Error creating driver: {e}")
             raise
 
+    def block_resources(self, adapter):
+        """Point the driver's URL blocklist at this site's patterns before it navigates"""
+        if not BLOCK_RESOURCES:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': adapter.blocked_urls})
+        except Exception as e:
+            logger.warning(f"  ⚠️ Could not set blocked URLs for {adapter.name}: {e}")
+
+    def record_page_stats(self, site):
+        """Record how many bytes the current page pulled in and how long it took to load"""
+        try:
+            stats = self.driver.execute_script(PAGE_STATS_JS) or {}
+        except Exception:
+            return None
+        if stats.get('bytes') is not None:
+            metrics.observe('pricewise_page_transfer_bytes', stats['bytes'], site=site)
+            logger.info(f"  📦 {site}: {stats['bytes'] / 1024:.0f} KB in {stats.get('requests')} requests, "
+                        f"loaded in {stats.get('load_ms')} ms")
+        self.page_stats = stats
+        return stats
+
+    def open_page(self, url):
+        """Navigate the current driver and count the page against its pool lease"""
+        self.driver.get(url)
+        if self.lease:
+            self.lease.pages += 1
+
     def extract_price(self, price_text):
         """Extract numeric price from text"""
         if not price_text or price_text == "N/A":
@@ -47,491 +1147,1857 @@ class UniversalEcommerceScraper:
 
     def is_relevant_product(self, title, search_query):
         """Check if product title is relevant to search query"""
-        if not title or len(title) < 3:
-            return False
-        
-        title_lower = title.lower()
-        query_lower = search_query.lower()
-        
-        # Filter out accessories when searching for main devices
-        main_device_keywords = ['iphone', 'phone', 'mobile', 'samsung', 'pixel', 'oneplus']
-        accessory_keywords = ['cover', 'case', 'protector', 'screen guard', 'tempered glass', 'pouch', 'skin']
-        
-        if any(dev in query_lower for dev in main_device_keywords):
-            if any(acc in title_lower for acc in accessory_keywords):
-                return False
-        
-        # Check word matching
-        stop_words = {'for', 'the', 'a', 'an', 'in', 'on', 'at', 'to', 'and', 'or', 'with'}
-        query_words = [word for word in query_lower.split() if len(word) > 2 and word not in stop_words]
-        
-        if not query_words:
-            return False
-        
-        match_count = sum(1 for word in query_words if word in title_lower)
-        return match_count >= len(query_words) / 2
+        return product_classifier.is_relevant(title, search_query)
 
     def auto_categorize_product(self, title):
         """Automatically categorize product based on title"""
-        title_lower = title.lower()
+        return product_classifier.categorize(title)
+
+    def count_cards(self, adapter):
+        """Number of product cards currently in the page"""
+        return self.driver.execute_script(COUNT_CARDS_JS, adapter.cards) or 0
+
+    def wait_for_products(self, adapter):
+        """Wait until the site's cards render, then scroll until enough load or the count stops growing"""
+        site = adapter.name
+        policy = adapter.wait
+        target = adapter.cards['max_cards']
+        start = time.monotonic()
+        deadline = start + policy['max_wait']
         
-        categories = {
-            "Mobile Phones": ['phone', 'mobile', 'iphone', 'samsung', 'oneplus', 'pixel'],
-            "Laptops": ['laptop', 'notebook', 'macbook', 'chromebook'],
-            "Television": ['tv', 'television', 'smart tv', 'led tv'],
-            "Audio Accessories": ['headphone', 'earphone', 'earbud', 'airpods'],
-            "Mobile Accessories": ['charger', 'cable', 'adapter', 'power bank'],
-            "Wearables": ['watch', 'smartwatch', 'fitness band'],
-            "Cameras": ['camera', 'dslr', 'gopro'],
-            "Apparel": ['shirt', 't-shirt', 'tshirt', 'polo', 'top', 'blouse', 'hoodie', 'sweatshirt'],
-            "Bottoms": ['jeans', 'trouser', 'pant', 'cargo', 'chino'],
-            "Footwear": ['shoe', 'sneaker', 'boot', 'sandal', 'slipper', 'footwear'],
-            "Kitchen Appliances": ['mixer', 'grinder', 'blender', 'juicer', 'cooker'],
-            "Furniture": ['sofa', 'chair', 'table', 'bed', 'mattress'],
-            "Personal Care": ['shampoo', 'conditioner', 'hair oil', 'soap', 'facewash'],
-            "Beauty & Cosmetics": ['makeup', 'lipstick', 'kajal', 'mascara', 'foundation'],
-        }
+        # Initial readiness: the first cards are in the DOM
+        try:
+            WebDriverWait(self.driver, policy['ready_timeout'], poll_frequency=WAIT_POLL_INTERVAL).until(
+                lambda driver: self.count_cards(adapter) > 0
+            )
+        except TimeoutException:
+            logger.info(f"  ⏱️ {site}: no cards after {policy['ready_timeout']}s")
+            return 0
         
-        for category, keywords in categories.items():
-            if any(word in title_lower for word in keywords):
-                return category
+        # Scroll until the target count is reached or the count stops growing
+        count = self.count_cards(adapter)
+        scrolls = 0
+        while count < target and scrolls < policy['max_scrolls'] and time.monotonic() < deadline:
+            self.driver.execute_script(f"window.scrollBy(0, {policy['scroll_step']});")
+            scrolls += 1
+            
+            grew = False
+            settle_until = min(deadline, time.monotonic() + policy['settle_time'])
+            while time.monotonic() < settle_until:
+                time.sleep(WAIT_POLL_INTERVAL)
+                new_count = self.count_cards(adapter)
+                if new_count > count:
+                    count = new_count
+                    grew = True
+                    break
+            
+            if not grew:
+                break
         
-        return "General Products"
+        logger.info(f"  ⏱️ {site}: {count} cards after {scrolls} scrolls, waited {time.monotonic() - start:.1f}s")
+        return count
+
+    def extract_cards(self, adapter):
+        """Read every product card on the current page with a single script call"""
+        return self.driver.execute_script(EXTRACT_CARDS_JS, adapter.cards) or []
 
-    def scrape_flipkart(self, search_query):
-        """Scrape products from Flipkart"""
-        logger.info("  📱 Loading Flipkart...")
+    def build_products(self, adapter, cards, search_query, search_url):
+        """Turn raw card fields into product dicts, applying the site's rules"""
+        site = adapter.name
+        config = adapter.cards
+        base_url = config['base_url']
         products = []
+        metrics.inc('pricewise_cards_found_total', len(cards), site=site)
         
-        try:
-            search_url = f"https://www.flipkart.com/search?q={quote_plus(search_query)}"
-            self.driver.get(search_url)
-            time.sleep(random.uniform(4, 6))
+        for card in cards:
+            # Extract title (and URL, for sites whose title is the product link)
+            title = ""
+            product_url = search_url
+            for candidate in card['title']:
+                title = candidate['text'] or ""
+                if title and len(title) > config['title_min_length']:
+                    if config['title_is_link'] and candidate['href']:
+                        product_url = absolute_url(candidate['href'], base_url)
+                    break
             
-            # Scroll to load more products
-            for _ in range(4):
-                self.driver.execute_script("window.scrollBy(0, 1000);")
-                time.sleep(2)
+            if not title or not self.is_relevant_product(title, search_query):
+                metrics.inc('pricewise_products_dropped_total', site=site, reason='irrelevant')
+                continue
             
-            # Try multiple container selectors
-            container_selectors = [
-                "div[data-id]", "div._1AtVbE", "div._13oc-S", 
-                "div.tUxRFH", "div._2kHMtA", "div.cPHDOP"
-            ]
-            
-            containers = []
-            for selector in container_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if len(elements) >= 3:
-                        containers = elements
+            # Extract URL
+            if not config['title_is_link']:
+                for candidate in card['link']:
+                    href = candidate['href']
+                    if href and (not config['url_patterns'] or any(p in href for p in config['url_patterns'])):
+                        product_url = absolute_url(href, base_url)
                         break
-                except:
-                    continue
             
-            for container in containers[:20]:
-                try:
-                    # Extract title
-                    title = ""
-                    title_selectors = ["a.wjcEIp", "a.WKTcLC", "div.KzDlHZ", "a.IRpwTa", 
-                                      "div._2WkVRV", "a.s1Q9rs", "a._2rpwqI", "div._4rR01T"]
-                    
-                    for selector in title_selectors:
-                        try:
-                            title_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            title = title_elem.text.strip() or title_elem.get_attribute('title') or ""
-                            if title and len(title) > 3:
-                                break
-                        except:
-                            continue
-                    
-                    if not title or not self.is_relevant_product(title, search_query):
-                        continue
-                    
-                    # Extract URL
-                    product_url = search_url
-                    try:
-                        link_elem = container.find_element(By.CSS_SELECTOR, "a[href]")
-                        href = link_elem.get_attribute('href')
-                        if href and ('/p/' in href or '/dp/' in href or 'pid=' in href):
-                            product_url = href if href.startswith('http') else f"https://www.flipkart.com{href}"
-                    except:
-                        pass
-                    
-                    # Extract price
-                    price_text = "N/A"
-                    price_selectors = ["div.Nx9bqj", "div._30jeq3", "div._3I9_wc", 
-                                      "div._25b18c", "div.hl05eU", "div._16Jk6d"]
-                    
-                    for selector in price_selectors:
-                        try:
-                            price_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_elem.text.strip()
-                            if price_text and ('₹' in price_text or re.search(r'\d{2,}', price_text)):
-                                break
-                        except:
-                            continue
-                    
-                    if price_text == "N/A":
-                        continue
-                    
-                    # Extract rating
-                    rating = "N/A"
-                    rating_selectors = ["span.Wphh3N", "div.XQDdHH", "div._3LWZlK", "span._2_R_DZ"]
-                    for selector in rating_selectors:
-                        try:
-                            rating_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            rating = rating_elem.text.strip()
-                            if rating:
-                                break
-                        except:
-                            continue
-                    
-                    # Extract image
-                    image_url = "N/A"
-                    try:
-                        img_elem = container.find_element(By.CSS_SELECTOR, "img")
-                        image_url = img_elem.get_attribute('src') or img_elem.get_attribute('data-src') or "N/A"
-                    except:
-                        pass
-                    
-                    products.append({
-                        'title': title,
-                        'price': price_text,
-                        'price_num': self.extract_price(price_text),
-                        'rating': rating,
-                        'category': self.auto_categorize_product(title),
-                        'source': 'Flipkart',
-                        'url': product_url,
-                        'image': image_url
-                    })
-                    
-                except Exception as e:
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"Error scraping Flipkart: {e}")
+            # Extract price
+            price_text = "N/A"
+            for candidate in card['price']:
+                text = candidate['text']
+                if text and ('₹' in text or re.search(config['price_pattern'], text)):
+                    price_text = text
+                    break
+            
+            if price_text == "N/A" and config['price_from_text'] and card.get('text'):
+                price_match = re.search(r'₹\s*[\d,]+', card['text'])
+                if price_match:
+                    price_text = price_match.group().strip()
+            
+            if price_text == "N/A":
+                metrics.inc('pricewise_products_dropped_total', site=site, reason='no_price')
+                continue
+            
+            # Extract rating
+            rating = "N/A"
+            for candidate in card['rating']:
+                text = candidate['text']
+                if text and (not config['rating_needs_digit'] or any(char.isdigit() for char in text)):
+                    rating = text
+                    break
+            
+            # Extract image
+            image_url = "N/A"
+            for candidate in card['image']:
+                if candidate['src']:
+                    image_url = absolute_url(candidate['src'], base_url)
+                    break
+            
+            products.append({
+                # Cards without their own link fall back to the search page, which can't tell them apart
+                'id': product_fingerprint(site, product_url if product_url != search_url else None, title),
+                'title': title,
+                'price': price_text,
+                'price_num': self.extract_price(price_text),
+                'rating': rating,
+                'category': self.auto_categorize_product(title),
+                'source': site,
+                'url': product_url,
+                'image': image_url
+            })
         
-        logger.info(f"  ✅ Found {len(products)} products on Flipkart")
         return products
 
-    def scrape_amazon(self, search_query):
-        """Scrape products from Amazon"""
-        logger.info("  🛒 Loading Amazon...")
+    def scrape_page(self, adapter, url, search_query):
+        """Load a search results page and extract the site's products from it"""
+        site = adapter.name
+        with self.span('page_load', site):
+            self.block_resources(adapter)
+            self.open_page(url)
+        with self.span('wait_scroll', site):
+            self.wait_for_products(adapter)
+        with self.span('extract', site):
+            cards = self.extract_cards(adapter)
+        self.record_page_stats(site)
+        with self.span('parse', site):
+            return self.build_products(adapter, cards, search_query, url)
+
+    def scrape_adapter(self, adapter, search_query, url=None):
+        """Scrape one site's search results in the browser"""
+        logger.info(f"  {adapter.icon} Loading {adapter.name}...")
         products = []
         
         try:
-            search_url = f"https://www.amazon.in/s?k={quote_plus(search_query)}&ref=nb_sb_noss"
-            self.driver.get(search_url)
-            time.sleep(random.uniform(4, 6))
-            
+            products = self.scrape_page(adapter, url or adapter.search_url(search_query), search_query)
+        except Exception as e:
+            logger.error(f"Error scraping {adapter.name}: {e}")
+        
+        logger.info(f"  ✅ Found {len(products)} products on {adapter.name}")
+        return products
+
+    def fetch_static(self, adapter, search_query, url=None):
+        """Fetch and parse a search page without a browser, or return None if unsupported or the parse failed"""
+        if adapter.fetch != 'http':
+            return None
+        
+        site = adapter.name
+        search_url = url or adapter.search_url(search_query)
+        try:
+            with self.span('http_fetch', site):
+                response = http_session.get(search_url, timeout=HTTP_TIMEOUT)
+            if response.status_code != 200:
+                logger.info(f"  ↩️ {site} returned HTTP {response.status_code}, using browser")
+                return None
+            with self.span('http_parse', site):
+                cards = extract_cards_html(response.text, adapter.cards)
+                if len(cards) < HTTP_MIN_PRODUCTS:
+                    logger.info(f"  ↩️ Static page for {site} had {len(cards)} product cards, using browser")
+                    return None
+                return self.build_products(adapter, cards, search_query, search_url)
+        except Exception as e:
+            logger.warning(f"  ↩️ Static fetch failed for {site}: {e}")
+            return None
+
+    def scrape_site(self, adapter, search_query, budget=None, page=1):
+        """Scrape one site over plain HTTP when possible, else on its own driver; returns (products, fetch_path)"""
+        if self.broker:
+            return self.broker.run(adapter, search_query, budget or adapter.timeout, page)
+        
+        url = adapter.page_url(search_query, page)
+        products = self.fetch_static(adapter, search_query, url)
+        if products is not None:
+            logger.info(f"  ⚡ Found {len(products)} products on {adapter.name} without a browser")
+            return products, 'http'
+        
+        budget = budget or adapter.timeout
+        worker = UniversalEcommerceScraper(driver_pool=self.driver_pool, timings=self.timings)
+        
+        if self.driver_pool:
+            checkout_start = time.perf_counter()
+            with self.driver_pool.lease(timeout=budget) as lease:
+                worker.record_span('driver_checkout', time.perf_counter() - checkout_start, adapter.name)
+                worker.lease = lease
+                worker.driver = lease.driver
+                worker.driver.set_page_load_timeout(budget)
+                return worker.scrape_adapter(adapter, search_query, url), 'browser'
+        
+        worker.create_driver()
+        try:
+            worker.driver.set_page_load_timeout(budget)
+            return worker.scrape_adapter(adapter, search_query, url), 'browser'
+        finally:
             try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-component-type='s-search-result']"))
-                )
-            except:
+                worker.driver.quit()
+            except Exception:
                 pass
+
+    def _timed_scrape(self, adapter, search_query, budget):
+        start = time.monotonic()
+        products, fetch_path = self.scrape_site(adapter, search_query, budget)
+        elapsed = time.monotonic() - start
+        self.record_span('site_total', elapsed, adapter.name)
+        return products, fetch_path, elapsed
+
+    def _site_result(self, adapter, future, started, budget):
+        """Collect one site's products and build its status report"""
+        site = adapter.name
+        products = []
+        report = {'status': 'ok', 'products': 0, 'elapsed': None, 'fetch': None}
+        
+        if not future.done():
+            logger.warning(f"  ⏱️ {site} exceeded its {budget:.0f}s budget")
+            report['status'] = 'timeout'
+            report['elapsed'] = round(time.monotonic() - started, 2)
+            return products, report
+        
+        try:
+            products, fetch_path, elapsed = future.result()
+            report['products'] = len(products)
+            report['fetch'] = fetch_path
+            report['elapsed'] = round(elapsed, 2)
+            if not products:
+                report['status'] = 'empty'
+        except DriverPoolExhausted as e:
+            report['status'] = 'busy'
+            report['error'] = str(e)
+        except Exception as e:
+            logger.error(f"Error scraping {site}: {e}")
+            report['status'] = 'error'
+            report['error'] = str(e)
+        return products, report
+
+    def _skipped_site(self, adapter, search_query):
+        """Serve a site whose circuit is open from cache instead of scraping it"""
+        site = adapter.name
+        products = (self.fallback(adapter, search_query) if self.fallback else None) or []
+        logger.info(f"  🚫 Skipping {site}, circuit open ({len(products)} cached products)")
+        report = {'status': 'circuit_open', 'products': len(products), 'elapsed': 0, 'fetch': 'cache' if products else None}
+        self.site_reports[site] = report
+        metrics.inc('pricewise_site_scrapes_total', site=site, status=report['status'])
+        return site, products, report
+
+    def iter_sites(self, search_query, sites=None):
+        """Scrape sites concurrently (default: all registered) and yield (site, products, report) as each finishes"""
+        self.site_reports = {}
+        adapters = []
+        executor = None
+        try:
+            for adapter in (sites if sites is not None else site_registry.all()):
+                if self.site_health and not self.site_health.allow(adapter.name):
+                    yield self._skipped_site(adapter, search_query)
+                else:
+                    adapters.append(adapter)
+            if not adapters:
+                return
             
-            self.driver.execute_script("window.scrollBy(0, 1500);")
-            time.sleep(2)
-            
-            product_containers = self.driver.find_elements(By.CSS_SELECTOR, "[data-component-type='s-search-result']")
+            budgets = {
+                adapter.name: self.site_health.budget(adapter) if self.site_health else adapter.timeout
+                for adapter in adapters
+            }
+            executor = ThreadPoolExecutor(max_workers=len(adapters), thread_name_prefix='scrape')
+            started = time.monotonic()
+            pending = {
+                executor.submit(self._timed_scrape, adapter, search_query, budgets[adapter.name]): adapter
+                for adapter in adapters
+            }
+            deadlines = {
+                future: started + budgets[adapter.name]
+                for future, adapter in pending.items()
+            }
             
-            for container in product_containers[:12]:
-                try:
-                    # Extract title
-                    title = ""
-                    title_selectors = ["h2 a span", "h2 span", ".a-size-mini span",
-                                      ".a-size-base-plus", ".a-size-base", "span.a-text-normal"]
-                    
-                    for selector in title_selectors:
-                        try:
-                            title_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            title = title_elem.text.strip()
-                            if title and len(title) > 5:
-                                break
-                        except:
-                            continue
-                    
-                    if not title or not self.is_relevant_product(title, search_query):
-                        continue
-                    
-                    # Extract URL
-                    product_url = search_url
-                    url_selectors = ["h2 a", ".s-product-image-container a", "a[href*='/dp/']"]
-                    
-                    for selector in url_selectors:
-                        try:
-                            link_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            href = link_elem.get_attribute('href')
-                            if href and '/dp/' in href:
-                                product_url = href if href.startswith('http') else f"https://www.amazon.in{href}"
-                                break
-                        except:
-                            continue
-                    
-                    # Extract price
-                    price_text = "N/A"
-                    price_selectors = [".a-price-whole", ".a-price .a-offscreen", ".a-price"]
-                    
-                    for selector in price_selectors:
-                        try:
-                            price_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_elem.text.strip() or price_elem.get_attribute("textContent").strip()
-                            if price_text and ('₹' in price_text or re.search(r'\d', price_text)):
-                                break
-                        except:
-                            continue
-                    
-                    if price_text == "N/A":
-                        continue
-                    
-                    # Extract rating
-                    rating = "N/A"
-                    rating_selectors = [".a-icon-alt", "span[aria-label*='out of']"]
-                    
-                    for selector in rating_selectors:
-                        try:
-                            rating_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            rating_text = rating_elem.get_attribute("title") or rating_elem.text
-                            if rating_text and any(char.isdigit() for char in rating_text):
-                                rating = rating_text
-                                break
-                        except:
-                            pass
-                    
-                    # Extract image
-                    image_url = "N/A"
+            while pending:
+                timeout = max(0, min(deadlines[f] for f in pending) - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                finished = [f for f in pending if f in done or deadlines[f] <= now]
+                for future in finished:
+                    adapter = pending.pop(future)
+                    site = adapter.name
+                    products, report = self._site_result(adapter, future, started, budgets[site])
+                    self.site_reports[site] = report
+                    metrics.inc('pricewise_site_scrapes_total', site=site, status=report['status'])
+                    if self.site_health:
+                        self.site_health.record(site, report['status'], report['elapsed'], report['fetch'])
+                    if self.price_history and products:
+                        self.price_history.record(products)
+                    yield site, products, report
+        finally:
+            # Timed-out sites keep running in the background and release their driver when done
+            if executor:
+                executor.shutdown(wait=False)
+            # A consumer that stopped early (client gone, job cancelled) never records the rest,
+            # which would leave a half-open site's probe taken for good
+            if self.site_health:
+                for adapter in adapters:
+                    if adapter.name not in self.site_reports:
+                        self.site_health.release(adapter.name)
+
+    def scrape_all(self, search_query, sites=None):
+        """Scrape every site concurrently, each within its own timeout budget"""
+        all_products = []
+        for site, products, report in self.iter_sites(search_query, sites):
+            products = self.filter_valid_products(products)
+            all_products += products
+            if self.progress:
+                self.progress.publish(site, products, report)
+        
+        if self.site_reports and all(r['status'] == 'busy' for r in self.site_reports.values()):
+            raise DriverPoolExhausted("No browser available, try again shortly")
+        
+        return all_products
+
+    def scrape_pages(self, adapter, search_query, start_page, max_pages, top_prices=()):
+        """Walk result pages until the budget runs out or a page adds nothing cheaper; returns (products, next_page, top)"""
+        site = adapter.name
+        budget = self.site_health.budget(adapter) if self.site_health else adapter.timeout
+        top = sorted(top_prices)[:DEEP_TOP_K]
+        products = []
+        page = start_page
+        last_page = min(start_page + max_pages - 1, DEEP_PAGE_LIMIT)
+        
+        executor = ThreadPoolExecutor(max_workers=adapter.parallel_pages, thread_name_prefix='page')
+        try:
+            while page <= last_page and len(products) < DEEP_MAX_CARDS:
+                batch = list(range(page, min(page + adapter.parallel_pages, last_page + 1)))
+                futures = [executor.submit(self.scrape_site, adapter, search_query, budget, n) for n in batch]
+                # Pages of the batch are already loading, so hitting the card cap still takes all of them
+                # and moves the cursor past them rather than fetching them again next time
+                for number, future in zip(batch, futures):
                     try:
-                        img_elem = container.find_element(By.CSS_SELECTOR, "img.s-image, img")
-                        image_url = img_elem.get_attribute('src') or "N/A"
-                    except:
-                        pass
+                        found = self.filter_valid_products(future.result()[0])
+                    except Exception as e:
+                        # A busy pool or a failed load says nothing about the results, so the page is retried next time
+                        logger.error(f"Error scraping {site} page {number}: {e}")
+                        return products, number, top
                     
-                    products.append({
-                        'title': title,
-                        'price': price_text,
-                        'price_num': self.extract_price(price_text),
-                        'rating': rating,
-                        'category': self.auto_categorize_product(title),
-                        'source': 'Amazon',
-                        'url': product_url,
-                        'image': image_url
-                    })
+                    if not found:
+                        logger.info(f"  📄 {site} has no results on page {number}")
+                        return products, None, top
                     
-                except Exception:
-                    continue
+                    ceiling = top[-1] if len(top) >= DEEP_TOP_K else None
+                    cheaper = ceiling is None or any(p['price_num'] < ceiling for p in found)
+                    products += found
+                    top = sorted(top + [p['price_num'] for p in found])[:DEEP_TOP_K]
+                    if self.price_history:
+                        self.price_history.record(found)
+                    logger.info(f"  📄 {site} page {number}: {len(found)} products")
                     
-        except Exception as e:
-            logger.error(f"Error scraping Amazon: {e}")
+                    if not cheaper:
+                        logger.info(f"  📄 {site} page {number} added nothing cheaper, stopping")
+                        return products, None, top
+                page = batch[-1] + 1
+        finally:
+            # After an early stop, later pages of the batch aren't waited on; any not yet started are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        logger.info(f"  ✅ Found {len(products)} products on Amazon")
-        return products
+        return products, (page if page <= DEEP_PAGE_LIMIT else None), top
 
-    def scrape_vijay_sales(self, search_query):
-        """Scrape products from Vijay Sales"""
-        logger.info("  🏬 Loading Vijay Sales...")
+    def deep_scrape(self, search_query, state, max_pages=DEEP_MAX_PAGES):
+        """Fetch the next result pages for every site in a cursor state; returns (products, next_state, reports)"""
+        adapters = [a for a in site_registry.all() if a.name in state and a.page_template]
         products = []
+        next_state = {}
+        reports = {}
+        if not adapters:
+            return products, next_state, reports
+        
+        with ThreadPoolExecutor(max_workers=len(adapters), thread_name_prefix='deep') as executor:
+            futures = {
+                executor.submit(self.scrape_pages, a, search_query, state[a.name]['page'], max_pages,
+                                state[a.name].get('top', ())): a
+                for a in adapters
+            }
+            for future, adapter in futures.items():
+                site = adapter.name
+                start_page = state[site]['page']
+                found, next_page, top = future.result()
+                products += found
+                reports[site] = {'from_page': start_page, 'products': len(found), 'next_page': next_page}
+                if next_page:
+                    next_state[site] = {'page': next_page, 'top': top}
+        
+        products.sort(key=lambda x: x['price_num'])
+        return products, next_state, reports
+
+    def filter_valid_products(self, products):
+        """Drop products without a usable price and sort the rest cheapest first"""
+        valid_products = []
+        for p in products:
+            if p['price_num'] is not None and p['price_num'] >= 10:
+                valid_products.append(p)
+            else:
+                metrics.inc('pricewise_products_dropped_total', site=p['source'], reason='no_price')
+        valid_products.sort(key=lambda x: x['price_num'])
+        for p in valid_products:
+            metrics.inc('pricewise_products_returned_total', site=p['source'])
+        return valid_products
+
+    def compare_prices(self, search_query, sites=None):
+        """Compare prices across the given sites, or every registered site"""
+        logger.info(f"\n🔍 UNIVERSAL PRICE COMPARISON")
+        logger.info(f"Searching for: '{search_query}'")
+        logger.info("=" * 60)
         
+        all_products = self.scrape_all(search_query, sites)
+        
+        # Each site's products were filtered as they arrived
+        with self.span('filter_sort'):
+            valid_products = sorted(all_products, key=lambda x: x['price_num'])
+        
+        logger.info(f"\n✅ Total products found: {len(valid_products)}")
+        return valid_products
+
+
+class MemoryCacheBackend:
+    """In-process LRU store for cached search results"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store for cached search results that survives restarts"""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at)"
+            )
+
+    def get(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE search_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key NOT IN "
+                "(SELECT key FROM search_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+
+
+class ResultCache:
+    """TTL cache for search results that serves stale entries while refreshing them"""
+
+    def __init__(self, backend, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL, flights=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.flights = flights  # SingleFlight that concurrent computes of one key share
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def store(self, key, value):
+        """Cache value under key; returns the stored_at it was cached with, or None if it wasn't"""
+        # Empty results are usually a blocked or broken scrape, so don't pin them
+        if value.get('products'):
+            # The timing breakdown describes one scrape, not the cached result
+            cached = {k: v for k, v in value.items() if k != 'timings'}
+            stored_at = time.time()
+            self.backend.set(key, cached, stored_at)
+            return stored_at
+        return None
+
+    def _compute_and_store(self, key, compute):
+        value = compute()
+        # Stored here rather than by the caller, so a result every caller gave up waiting on is still kept
+        return value, self.store(key, value) or time.time()
+
+    def compute(self, key, compute):
+        """Run compute for key, joining one in flight, and cache it from the thread that ran it; returns (value, stored_at)"""
+        if self.flights is None:
+            return self._compute_and_store(key, compute)
+        return self.flights.run(key, lambda: self._compute_and_store(key, compute))
+
+    def start(self, key, compute):
+        """Like compute, but returns a Future of (value, stored_at) instead of waiting for it"""
+        if self.flights is None:
+            future = Future()
+            try:
+                future.set_result(self._compute_and_store(key, compute))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.flights.start(key, lambda: self._compute_and_store(key, compute))
+
+    def _refresh(self, key, compute):
         try:
-            search_url = f"https://www.vijaysales.com/search-listing?q={quote_plus(search_query)}"
-            self.driver.get(search_url)
-            time.sleep(random.uniform(4, 6))
-            
-            for i in range(4):
-                self.driver.execute_script("window.scrollBy(0, 800);")
-                time.sleep(2)
-            
-            container_selectors = [
-                ".product-card", ".product-item", ".item",
-                ".product-container", "[class*='product']"
-            ]
-            
-            containers = []
-            for selector in container_selectors:
+            self.compute(key, compute)
+            logger.info(f"🔄 Refreshed cached results for '{key}'")
+        except Exception as e:
+            logger.error(f"Error refreshing cache for '{key}': {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def refresh_in_background(self, key, compute):
+        """Start a refresh for key unless one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+        return True
+
+    def peek(self, key):
+        """Return (value, status, stored_at) for a fresh or stale entry without refreshing it, else None"""
+        entry = self.backend.get(key)
+        status = None
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                status = 'hit'
+            elif age < self.ttl + self.stale_ttl:
+                status = 'stale'
+        metrics.inc('pricewise_cache_lookups_total', status=status or 'miss')
+        return (value, status, stored_at) if status else None
+
+    def get_or_compute(self, key, compute):
+        """Return (value, status, stored_at) where status is 'hit', 'stale' or 'miss'"""
+        entry = self.backend.get(key)
+        
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                metrics.inc('pricewise_cache_lookups_total', status='hit')
+                return value, 'hit', stored_at
+            if age < self.ttl + self.stale_ttl:
+                metrics.inc('pricewise_cache_lookups_total', status='stale')
+                self.refresh_in_background(key, compute)
+                return value, 'stale', stored_at
+            self.backend.delete(key)
+        
+        metrics.inc('pricewise_cache_lookups_total', status='miss')
+        value, stored_at = self.compute(key, compute)
+        return value, 'miss', stored_at
+
+
+class SingleFlight:
+    """Share one in-flight computation between all callers asking for the same key"""
+
+    def __init__(self, timeout=SEARCH_WAIT_TIMEOUT):
+        self.timeout = timeout  # how long each caller waits before giving up
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _execute(self, key, future, fn):
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def start(self, key, fn):
+        """Start fn() for key in the background unless a call for key is already running; returns its Future"""
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+        
+        if leader:
+            # Run detached so the computation finishes even if every caller times out
+            threading.Thread(target=self._execute, args=(key, future, fn), daemon=True).start()
+        else:
+            logger.info(f"🤝 Joining in-flight search for '{key}'")
+        return future
+
+    def run(self, key, fn, timeout=None):
+        """Return fn() for key, joining a running call for the same key if there is one"""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.start(key, fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise SearchTimeout(f"Search for '{key}' is still running, try again shortly")
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+
+class SearchProgress:
+    """Per-site results of one in-flight search, replayed to every reader that follows it"""
+
+    def __init__(self):
+        self.events = []  # (site, products, report) in the order sites finished
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def publish(self, site, products, report):
+        with self._cond:
+            self.events.append((site, products, report))
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def follow(self, timeout=SEARCH_WAIT_TIMEOUT):
+        """Yield every site result so far, then each new one until the search finishes"""
+        deadline = time.monotonic() + timeout
+        seen = 0
+        while True:
+            with self._cond:
+                while seen == len(self.events) and not self.finished:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SearchTimeout("Search is still running, try again shortly")
+                    self._cond.wait(remaining)
+                events = self.events[seen:]
+                seen = len(self.events)
+                finished = self.finished
+            yield from events
+            if finished:
+                return
+
+
+class ListingFeatures:
+    """Brand, model, storage and title tokens pulled from one product title"""
+
+    __slots__ = ('brand', 'model', 'storage', 'variants', 'tokens')
+
+    def __init__(self, title):
+        title_lower = title.lower()
+        tokens = tokenize(title_lower)
+        
+        self.brand = None
+        for token in tokens:
+            if token in MATCH_BRANDS or token in BRAND_ALIASES:
+                self.brand = BRAND_ALIASES.get(token, token)
+                break
+        
+        # Storage is the largest capacity mentioned, so '8GB RAM, 128GB' and '128 GB' agree
+        capacities = [int(size) * (1024 if unit == 'tb' else 1) for size, unit in _STORAGE_RE.findall(title_lower)]
+        self.storage = max(capacities) if capacities else None
+        storage_tokens = {f"{size}{unit}" for size, unit in _STORAGE_RE.findall(title_lower)}
+        
+        distinctive = []
+        for i, t in enumerate(tokens):
+            if t in MATCH_NOISE_WORDS or t in storage_tokens or t in MATCH_BRANDS:
+                continue
+            if t.isdigit() and i + 1 < len(tokens) and tokens[i + 1] in ('gb', 'tb'):
+                continue  # the '128' of '128 GB'
+            distinctive.append(t)
+        self.variants = frozenset(t for t in distinctive if t in VARIANT_WORDS)
+        # The model is the first token carrying a digit ('15', 's24', 'wh1000xm5'), else the first word
+        self.model = next((t for t in distinctive if any(c.isdigit() for c in t)),
+                          distinctive[0] if distinctive else None)
+        self.tokens = frozenset(distinctive)
+
+    def matches(self, other):
+        """Whether two listings with the same model token describe the same product"""
+        if self.brand and other.brand and self.brand != other.brand:
+            return False
+        if self.variants != other.variants:
+            return False
+        if self.storage and other.storage and self.storage != other.storage:
+            return False
+        if not self.tokens or not other.tokens:
+            return self.tokens == other.tokens
+        overlap = len(self.tokens & other.tokens)
+        return overlap / min(len(self.tokens), len(other.tokens)) >= MATCH_SIMILARITY
+
+
+def group_products(products):
+    """Cluster equivalent listings across sites.
+
+    Listings are first bucketed by model token so comparisons only happen inside small
+    blocks, then each listing joins the first cluster in its block whose representative it
+    matches. Offers are indexes into products, cheapest first.
+    """
+    blocks = {}
+    for index, product in enumerate(products):
+        features = ListingFeatures(product['title'])
+        clusters = blocks.setdefault(features.model, [])
+        for representative, members in clusters:
+            if representative.matches(features):
+                members.append(index)
+                break
+        else:
+            clusters.append((features, [index]))
+    
+    groups = []
+    for model, clusters in blocks.items():
+        for features, members in clusters:
+            members.sort(key=lambda i: products[i]['price_num'] if products[i]['price_num'] is not None else float('inf'))
+            cheapest = products[members[0]]
+            groups.append({
+                'title': cheapest['title'],
+                'brand': features.brand,
+                'model': model,
+                'storage_gb': features.storage,
+                'offers': members,
+                'sources': sorted({products[i]['source'] for i in members}),
+                'cheapest': {
+                    'source': cheapest['source'],
+                    'price': cheapest['price'],
+                    'price_num': cheapest['price_num'],
+                    'url': cheapest['url'],
+                },
+            })
+    
+    groups.sort(key=lambda g: (-len(g['sources']), g['cheapest']['price_num'] or 0))
+    return groups
+
+
+class ResultIndex:
+    """A result set presorted by price with positions grouped by source and category, for filtered views"""
+
+    def __init__(self, products):
+        self.products = sorted(products, key=lambda p: p['price_num'])
+        self.prices = [p['price_num'] for p in self.products]
+        self.by_field = {'source': {}, 'category': {}}
+        for position, product in enumerate(self.products):
+            for field, index in self.by_field.items():
+                index.setdefault(product.get(field), []).append(position)
+
+    def positions(self, source=None, category=None, min_price=None, max_price=None):
+        """Price-ordered positions of the products matching every given filter"""
+        lo = bisect_left(self.prices, min_price) if min_price is not None else 0
+        hi = bisect_right(self.prices, max_price) if max_price is not None else len(self.prices)
+        filters = {field: value for field, value in (('source', source), ('category', category)) if value}
+        if not filters:
+            return list(range(lo, hi))
+        
+        # Walk the smallest matching bucket, clipped to the price range, and check the other filter directly
+        field = min(filters, key=lambda f: len(self.by_field[f].get(filters[f], ())))
+        bucket = self.by_field[field].get(filters[field], [])
+        candidates = bucket[bisect_left(bucket, lo):bisect_left(bucket, hi)]
+        others = [(f, v) for f, v in filters.items() if f != field]
+        return [i for i in candidates if all(self.products[i].get(f) == v for f, v in others)]
+
+    def _counts(self, field, positions):
+        counts = {}
+        for i in positions:
+            value = self.products[i].get(field)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def query(self, source=None, category=None, min_price=None, max_price=None, sort='price-asc', page=1, limit=None):
+        """Return (products, total_matching, facets) for one page of a filtered, sorted view"""
+        matching = self.positions(source, category, min_price, max_price)
+        # Each facet counts what selecting one of its values would return, given the other filters
+        facets = {
+            'source': self._counts('source', self.positions(None, category, min_price, max_price)),
+            'category': self._counts('category', self.positions(source, None, min_price, max_price)),
+            'price': {'min': self.prices[0], 'max': self.prices[-1]} if self.prices else None,
+        }
+        total = len(matching)
+        if sort == 'price-desc':
+            matching.reverse()
+        if limit:
+            matching = matching[(page - 1) * limit:page * limit]
+        return [self.products[i] for i in matching], total, facets
+
+
+class ResultSnapshots:
+    """Recent versions of each search's result set, keyed by product fingerprint, for diffing"""
+
+    def __init__(self, max_searches=SNAPSHOT_SEARCHES, max_versions=SNAPSHOT_VERSIONS):
+        self.max_searches = max_searches
+        self.max_versions = max_versions
+        self._searches = OrderedDict()  # key -> OrderedDict(version -> {fingerprint: product})
+        self._lock = threading.Lock()
+
+    def record(self, key, products):
+        """Remember a result set and return its version, a hash of its fingerprints and prices"""
+        snapshot = {}
+        for product in products:
+            fingerprint = product.get('id') or product_fingerprint(product['source'], product['url'], product['title'])
+            snapshot.setdefault(fingerprint, product)
+        digest = hashlib.sha1()
+        for fingerprint in sorted(snapshot):
+            digest.update(f"{fingerprint}:{snapshot[fingerprint]['price_num']};".encode())
+        version = digest.hexdigest()[:16]
+        
+        with self._lock:
+            versions = self._searches.setdefault(key, OrderedDict())
+            self._searches.move_to_end(key)
+            versions[version] = snapshot
+            versions.move_to_end(version)
+            while len(versions) > self.max_versions:
+                versions.popitem(last=False)
+            while len(self._searches) > self.max_searches:
+                self._searches.popitem(last=False)
+        return version
+
+    def diff(self, key, since, version):
+        """(added, removed fingerprints, price-changed, previous prices) between two versions, or None if either is gone"""
+        with self._lock:
+            versions = self._searches.get(key, {})
+            old, new = versions.get(since), versions.get(version)
+        if old is None or new is None:
+            return None
+        
+        added = [product for fingerprint, product in new.items() if fingerprint not in old]
+        removed = [fingerprint for fingerprint in old if fingerprint not in new]
+        previous = {fingerprint: old[fingerprint]['price_num'] for fingerprint, product in new.items()
+                    if fingerprint in old and old[fingerprint]['price_num'] != product['price_num']}
+        return added, removed, [new[fingerprint] for fingerprint in previous], previous
+
+
+def encode_products(products, fields=None, layout='rows'):
+    """Project products onto fields, as row dicts or one array per field with repeated strings dictionary-encoded"""
+    fields = list(fields or PRODUCT_FIELDS)
+    if layout == 'rows':
+        if fields == list(PRODUCT_FIELDS):
+            return products
+        return [{name: product.get(name) for name in fields} for product in products]
+    
+    columns = {}
+    dictionaries = {}
+    for name in fields:
+        values = [product.get(name) for product in products]
+        if name in DICTIONARY_FIELDS:
+            codes = {}
+            columns[name] = [codes.setdefault(value, len(codes)) for value in values]
+            dictionaries[name] = list(codes)
+        else:
+            columns[name] = values
+    return {'layout': 'columns', 'count': len(products), 'columns': columns, 'dictionaries': dictionaries}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Compact, unsorted JSON responses, serialized with orjson when it's installed"""
+    sort_keys = False
+    ensure_ascii = False
+    compact = True
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class PriceHistoryStore:
+    """SQLite time series of every scraped price, written in batches off the request path"""
+
+    _STOP = object()
+
+    def __init__(self, path=HISTORY_PATH, batch_size=HISTORY_BATCH_SIZE, flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = queue.Queue()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS price_history ("
+                "id INTEGER PRIMARY KEY, product_key TEXT NOT NULL, title TEXT NOT NULL, "
+                "source TEXT NOT NULL, price_num INTEGER NOT NULL, url TEXT, observed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_price_history_key "
+                "ON price_history (product_key, source, observed_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_price_history_time ON price_history (observed_at)"
+            )
+        self._writer = threading.Thread(target=self._write_loop, name='price-history-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, products, observed_at=None):
+        """Queue products for writing; returns immediately"""
+        observed_at = observed_at or time.time()
+        for p in products:
+            if p.get('price_num') is None:
+                continue
+            self._pending.put((product_key(p['title']), p['title'], p['source'], p['price_num'], p.get('url'), observed_at))
+
+    def _write_loop(self):
+        conn = self._connect()
+        batch = []
+        stopping = False
+        while not stopping:
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
                 try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if len(elements) >= 2:
-                        containers = elements
-                        break
-                except:
-                    continue
-            
-            for container in containers[:15]:
+                    row = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is self._STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            if batch:
                 try:
-                    title = ""
-                    product_url = search_url
-                    
-                    # Extract title and URL
-                    title_selectors = ["a.product-name", "a.product-title", "a.item-name"]
-                    
-                    for selector in title_selectors:
-                        try:
-                            link_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            title = link_elem.text.strip() or link_elem.get_attribute('title') or ""
-                            if title and len(title) > 3:
-                                href = link_elem.get_attribute('href')
-                                if href:
-                                    product_url = href if href.startswith('http') else f"https://www.vijaysales.com{href}"
-                                break
-                        except:
-                            continue
-                    
-                    if not title or not self.is_relevant_product(title, search_query):
-                        continue
-                    
-                    # Extract price
-                    price_text = "N/A"
-                    price_selectors = [".price", ".final-price", ".current-price", ".selling-price"]
-                    
-                    for selector in price_selectors:
-                        try:
-                            price_elem = container.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_elem.text.strip()
-                            if price_text and ('₹' in price_text or re.search(r'\d{2,}', price_text)):
-                                break
-                        except:
-                            continue
-                    
-                    if price_text == "N/A":
-                        try:
-                            container_text = container.text
-                            price_match = re.search(r'₹\s*[\d,]+', container_text)
-                            if price_match:
-                                price_text = price_match.group().strip()
-                        except:
-                            pass
-                    
-                    if price_text == "N/A":
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO price_history (product_key, title, source, price_num, url, observed_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", batch
+                        )
+                except Exception as e:
+                    logger.error(f"Error writing price history: {e}")
+                batch = []
+        conn.close()
+
+    def close(self):
+        """Flush queued rows and stop the writer thread"""
+        self._pending.put(self._STOP)
+        self._writer.join(timeout=10)
+
+    def _query(self, sql, params):
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def history(self, key, source=None, days=30, limit=1000):
+        """Price observations for one product, oldest first"""
+        sql = ("SELECT title, source, price_num, url, observed_at FROM price_history "
+               "WHERE product_key = ? AND observed_at >= ?")
+        params = [key, time.time() - days * 86400]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY observed_at LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    def price_range(self, key, days=30):
+        """Min, max, average and latest price per source over the window"""
+        return self._query(
+            "SELECT source, MIN(price_num) AS min_price, MAX(price_num) AS max_price, "
+            "ROUND(AVG(price_num)) AS avg_price, COUNT(*) AS observations, "
+            "MIN(observed_at) AS first_seen, MAX(observed_at) AS last_seen, "
+            "(SELECT price_num FROM price_history latest WHERE latest.product_key = h.product_key "
+            " AND latest.source = h.source ORDER BY observed_at DESC LIMIT 1) AS latest_price "
+            "FROM price_history h WHERE product_key = ? AND observed_at >= ? "
+            "GROUP BY product_key, source ORDER BY min_price",
+            (key, time.time() - days * 86400)
+        )
+
+    def price_drops(self, days=7, min_drop_pct=5, limit=50):
+        """Products whose latest price is at least min_drop_pct below their peak in the window"""
+        return self._query(
+            "WITH windowed AS ("
+            " SELECT product_key, title, source, url, price_num, observed_at,"
+            " ROW_NUMBER() OVER (PARTITION BY product_key, source ORDER BY observed_at DESC) AS rn,"
+            " MAX(price_num) OVER (PARTITION BY product_key, source) AS max_price"
+            " FROM price_history WHERE observed_at >= ?"
+            ") "
+            "SELECT product_key, title, source, url, price_num AS latest_price, max_price, observed_at, "
+            "ROUND((max_price - price_num) * 100.0 / max_price, 1) AS drop_pct "
+            "FROM windowed WHERE rn = 1 AND max_price > 0 "
+            "AND (max_price - price_num) * 100.0 / max_price >= ? "
+            "ORDER BY drop_pct DESC LIMIT ?",
+            (time.time() - days * 86400, min_drop_pct, limit)
+        )
+
+
+class SearchJob:
+    """A queued search and its progress"""
+
+    def __init__(self, query, priority=JOB_DEFAULT_PRIORITY, site_filter=None):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.priority = priority
+        self.site_filter = site_filter  # adapters to scrape, or None for every site
+        self.status = 'queued'
+        self.products = []
+        self.sites = {}
+        self.groups = []
+        self.error = None
+        self.cache = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = threading.Event()
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'query': self.query,
+            'priority': self.priority,
+            'site_filter': [a.name for a in self.site_filter] if self.site_filter else None,
+            'status': self.status,
+            'total_products': len(self.products),
+            'products': self.products,
+            'sites': dict(self.sites),
+            'groups': self.groups,
+            'error': self.error,
+            'cache': self.cache,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """Priority queue of search jobs drained by a fixed pool of worker threads"""
+
+    def __init__(self, run_job, workers=JOB_WORKERS, max_depth=JOB_QUEUE_MAX, retention=JOB_RETENTION):
+        self.run_job = run_job
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._queued = 0  # jobs waiting to run; cancelled ones stay in _queue until a worker skips them
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'search-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def submit(self, query, priority=JOB_DEFAULT_PRIORITY, site_filter=None):
+        """Queue a search and return its job"""
+        with self._lock:
+            self._prune()
+            if self._queued >= self.max_depth:
+                raise JobQueueFull("Too many searches queued, try again shortly")
+            job = SearchJob(query, priority, site_filter)
+            self._jobs[job.id] = job
+            self._queued += 1
+            self._queue.put((priority, next(self._order), job))
+            self._ensure_workers()
+        logger.info(f"📥 Queued job {job.id} for '{query}' (priority {priority})")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job, or None if unknown"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancelled.set()
+        with self._lock:
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+                self._queued -= 1
+        return job
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                with self._lock:
+                    if job.status != 'queued':  # cancelled while waiting
                         continue
-                    
-                    # Extract rating
-                    rating = "N/A"
-                    try:
-                        rating_elem = container.find_element(By.CSS_SELECTOR, ".rating, .star-rating")
-                        rating = rating_elem.text.strip()
-                    except:
-                        pass
-                    
-                    # Extract image
-                    image_url = "N/A"
-                    try:
-                        img_elem = container.find_element(By.CSS_SELECTOR, "img")
-                        image_url = img_elem.get_attribute('src') or "N/A"
-                        if image_url != "N/A" and image_url.startswith('/'):
-                            image_url = f"https://www.vijaysales.com{image_url}"
-                    except:
-                        pass
-                    
-                    products.append({
-                        'title': title,
-                        'price': price_text,
-                        'price_num': self.extract_price(price_text),
-                        'rating': rating,
-                        'category': self.auto_categorize_product(title),
-                        'source': 'Vijay Sales',
-                        'url': product_url,
-                        'image': image_url
-                    })
-                    
-                except Exception:
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"Error scraping Vijay Sales: {e}")
-        
-        logger.info(f"  ✅ Found {len(products)} products on Vijay Sales")
-        return products
+                    job.status = 'running'
+                    job.started_at = time.time()
+                    self._queued -= 1
+                self.run_job(job)
+                job.status = 'cancelled' if job.cancelled.is_set() else 'done'
+            except Exception as e:
+                logger.error(f"❌ Job {job.id} failed: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                if job.finished_at is None:
+                    job.finished_at = time.time()
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'workers': self.workers, 'queued': self._queued, 'max_depth': self.max_depth, 'jobs': counts}
+
+
+class WorkerBroker:
+    """SQLite-backed task queue between the API and scraper worker processes.
+
+    Workers register their capacity and heartbeat; each submitted scrape is assigned to the
+    live worker with the lowest load relative to its capacity. Tasks held by a worker that
+    stops heartbeating are reassigned (if not started) or failed (if running).
+    """
+
+    def __init__(self, path=WORKER_DB_PATH, ttl=WORKER_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "id TEXT PRIMARY KEY, host TEXT NOT NULL, pid INTEGER NOT NULL, capacity INTEGER NOT NULL, "
+                "active INTEGER NOT NULL DEFAULT 1, started_at REAL NOT NULL, heartbeat REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, worker_id TEXT, site TEXT NOT NULL, query TEXT NOT NULL, "
+                "page INTEGER NOT NULL, budget REAL NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_worker ON tasks (worker_id, status)")
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front so concurrent schedulers can't pick the same slot
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _pick_worker(self, conn, exclude=None):
+        row = conn.execute(
+            "SELECT w.id FROM workers w LEFT JOIN tasks t "
+            "ON t.worker_id = w.id AND t.status IN ('queued', 'running') "
+            "WHERE w.active = 1 AND w.heartbeat > ? AND w.id != ? "
+            "GROUP BY w.id ORDER BY CAST(COUNT(t.id) AS REAL) / w.capacity, COUNT(t.id), RANDOM() LIMIT 1",
+            (time.time() - self.ttl, exclude or '')
+        ).fetchone()
+        return row[0] if row else None
+
+    def _requeue(self, conn, worker_id):
+        """Move a worker's unstarted tasks to other workers, or fail them as busy if there are none"""
+        for (task_id,) in conn.execute(
+            "SELECT id FROM tasks WHERE worker_id = ? AND status = 'queued'", (worker_id,)
+        ).fetchall():
+            target = self._pick_worker(conn, exclude=worker_id)
+            if target:
+                conn.execute("UPDATE tasks SET worker_id = ? WHERE id = ?", (target, task_id))
+            else:
+                conn.execute(
+                    "UPDATE tasks SET status = 'busy', error = 'No scraper workers available', finished_at = ? "
+                    "WHERE id = ?", (time.time(), task_id)
+                )
+
+    def _reap(self, conn):
+        now = time.time()
+        for (worker_id,) in conn.execute(
+            "SELECT id FROM workers WHERE heartbeat <= ?", (now - self.ttl,)
+        ).fetchall():
+            logger.warning(f"💀 Scraper worker {worker_id} stopped heartbeating, reassigning its tasks")
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'Scraper worker lost', finished_at = ? "
+                "WHERE worker_id = ? AND status = 'running'", (now, worker_id)
+            )
+            self._requeue(conn, worker_id)
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    # Worker side
+
+    def register(self, capacity, host=None):
+        worker_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, host, pid, capacity, started_at, heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (worker_id, host or socket.gethostname(), os.getpid(), max(1, capacity), now, now)
+            )
+        return worker_id
+
+    def heartbeat(self, worker_id):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (now, worker_id))
+            conn.execute(
+                "DELETE FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?", (now - WORKER_TASK_RETENTION,)
+            )
+
+    def drain(self, worker_id):
+        """Stop scheduling onto a worker and hand its unstarted tasks to others"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE workers SET active = 0 WHERE id = ?", (worker_id,))
+            self._requeue(conn, worker_id)
+
+    def deregister(self, worker_id):
+        with self._transaction() as conn:
+            self._requeue(conn, worker_id)
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def claim(self, worker_id, limit):
+        """Mark up to limit of this worker's queued tasks as running and return them"""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, site, query, page, budget FROM tasks WHERE worker_id = ? AND status = 'queued' "
+                "ORDER BY created_at LIMIT ?", (worker_id, limit)
+            ).fetchall()
+            now = time.time()
+            for row in rows:
+                conn.execute("UPDATE tasks SET status = 'running', started_at = ? WHERE id = ?", (now, row[0]))
+        return [dict(zip(('id', 'site', 'query', 'page', 'budget'), row)) for row in rows]
+
+    def finish(self, task_id, status, result=None, error=None):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), task_id)
+            )
+
+    # API side
+
+    def submit(self, site, query, page, budget):
+        """Assign a scrape to the least-loaded live worker; returns the task id"""
+        task_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            self._reap(conn)
+            worker_id = self._pick_worker(conn)
+            if worker_id is None:
+                raise DriverPoolExhausted("No scraper workers available, try again shortly")
+            conn.execute(
+                "INSERT INTO tasks (id, worker_id, site, query, page, budget, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (task_id, worker_id, site, query, page, budget, time.time())
+            )
+        return task_id
+
+    def wait(self, task_id, timeout):
+        """Block until a task finishes and return its result"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT status, result, error FROM tasks WHERE id = ?", (task_id,)
+                ).fetchone()
+            if row is None:
+                raise RuntimeError(f"Scrape task {task_id} disappeared")
+            status, result, error = row
+            if status == 'done':
+                return json.loads(result)
+            if status == 'busy':
+                raise DriverPoolExhausted(error)
+            if status == 'failed':
+                raise RuntimeError(error)
+            if time.monotonic() >= deadline:
+                raise SearchTimeout(f"Scrape task {task_id} is still {status}")
+            time.sleep(WORKER_POLL_INTERVAL)
+
+    def run(self, adapter, search_query, budget, page=1):
+        """Scrape one site page on a worker; returns (products, fetch_path) like scrape_site"""
+        task_id = self.submit(adapter.name, search_query, page, budget)
+        result = self.wait(task_id, budget + self.ttl)
+        return result['products'], result['fetch']
+
+    def _workers(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT w.id, w.host, w.pid, w.capacity, w.active, w.heartbeat, COUNT(t.id) FROM workers w "
+                "LEFT JOIN tasks t ON t.worker_id = w.id AND t.status IN ('queued', 'running') "
+                "WHERE w.heartbeat > ? GROUP BY w.id", (time.time() - self.ttl,)
+            ).fetchall()
+
+    def saturated(self):
+        """True when no live worker has a free slot"""
+        return not any(active and load < capacity for _, _, _, capacity, active, _, load in self._workers())
+
+    def stats(self):
+        now = time.time()
+        workers = [{
+            'id': worker_id,
+            'host': host,
+            'pid': pid,
+            'capacity': capacity,
+            'load': load,
+            'active': bool(active),
+            'heartbeat_age': round(now - heartbeat, 1),
+        } for worker_id, host, pid, capacity, active, heartbeat, load in self._workers()]
+        with self._lock:
+            tasks = dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {
+            'workers': workers,
+            'capacity': sum(w['capacity'] for w in workers if w['active']),
+            'tasks': tasks,
+        }
+
+
+class QueryTracker:
+    """Search counts per normalized query, halving every half_life seconds so old traffic fades"""
+
+    def __init__(self, half_life=PREWARM_HALF_LIFE, max_entries=PREWARM_TRACKED):
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self._entries = {}  # key -> [score, updated_at, query]
+        self._lock = threading.Lock()
+
+    def _score(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def record(self, query):
+        key = normalize_query(query)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            score = self._score(entry, now) + 1 if entry else 1
+            self._entries[key] = [score, now, query]
+            if len(self._entries) > self.max_entries:
+                # Forget the coldest tenth rather than pruning on every insert
+                ranked = sorted(self._entries, key=lambda k: self._score(self._entries[k], now))
+                for cold in ranked[:self.max_entries // 10]:
+                    del self._entries[cold]
+
+    def top(self, n):
+        """The n hottest queries as (key, query, score), hottest first"""
+        now = time.time()
+        with self._lock:
+            ranked = [(key, entry[2], self._score(entry, now)) for key, entry in self._entries.items()]
+        ranked.sort(key=lambda item: item[2], reverse=True)
+        return ranked[:n]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class Prewarmer:
+    """Periodically re-scrapes the hottest queries so their cache entries never go cold"""
+
+    def __init__(self, tracker, cache, refresh, is_busy=lambda: False, top_n=PREWARM_TOP_N,
+                 interval=PREWARM_INTERVAL, concurrency=PREWARM_CONCURRENCY, rate=PREWARM_RATE):
+        self.tracker = tracker
+        self.cache = cache
+        self.refresh = refresh  # (key, query) -> search result, cached through cache.compute
+        self.is_busy = is_busy
+        self.top_n = top_n
+        self.interval = interval
+        self.concurrency = concurrency
+        self.spacing = 60 / rate if rate > 0 else 0
+        self.last_run = None
+        self.counts = {'warmed': 0, 'failed': 0, 'skipped_fresh': 0, 'deferred': 0}
+        self._thread = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
 
-    def scrape_jiomart(self, search_query):
-        """Scrape products from JioMart"""
-        logger.info("  🔵 Loading JioMart...")
-        products = []
-        
-        try:
-            search_url = f"https://www.jiomart.com/search/{quote_plus(search_query)}"
-            self.driver.get(search_url)
-            time.sleep(random.uniform(4, 6))
-            
-            for _ in range(3):
-                self.driver.execute_script("window.scrollBy(0, 1000);")
-                time.sleep(1.5)
-            
-            containers = self.driver.find_elements(By.CSS_SELECTOR, "div.plp-card-container")
-            
-            for container in containers[:15]:
-                try:
-                    title = container.find_element(By.CSS_SELECTOR, "div.plp-card-details-name").text.strip()
-                    price_text = container.find_element(By.CSS_SELECTOR, "span.jm-heading-xxs").text.strip()
-                    
-                    if not self.is_relevant_product(title, search_query):
-                        continue
-                    
-                    try:
-                        product_url = container.find_element(By.TAG_NAME, "a").get_attribute("href")
-                    except:
-                        product_url = search_url
-                    
-                    try:
-                        image_url = container.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-                    except:
-                        image_url = "N/A"
-                    
-                    products.append({
-                        'title': title,
-                        'price': price_text,
-                        'price_num': self.extract_price(price_text),
-                        'rating': "N/A",
-                        'category': self.auto_categorize_product(title),
-                        'source': 'JioMart',
-                        'url': product_url,
-                        'image': image_url
-                    })
-                    
-                except Exception:
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"Error scraping JioMart: {e}")
-        
-        logger.info(f"  ✅ Found {len(products)} products on JioMart")
-        return products
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='prewarm', daemon=True)
+                self._thread.start()
+                logger.info(f"🔥 Pre-warming the top {self.top_n} queries every {self.interval:.0f}s")
 
-    def compare_prices(self, search_query):
-        """Compare prices across all platforms"""
-        logger.info(f"\n🔍 UNIVERSAL PRICE COMPARISON")
-        logger.info(f"Searching for: '{search_query}'")
-        logger.info("=" * 60)
-        
-        all_products = []
-        self.create_driver()
-        
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error pre-warming queries: {e}")
+
+    def is_due(self, key):
+        """Whether key's cache entry is missing or would expire before the next round"""
+        entry = self.cache.backend.get(key)
+        return entry is None or time.time() - entry[1] > self.cache.ttl - self.interval
+
+    def _count(self, status, value=1):
+        with self._lock:
+            self.counts[status] += value
+        metrics.inc('pricewise_prewarm_total', value, status=status)
+
+    def _warm(self, key, query):
         try:
-            all_products += self.scrape_flipkart(search_query)
-            all_products += self.scrape_amazon(search_query)
-            all_products += self.scrape_vijay_sales(search_query)
-            all_products += self.scrape_jiomart(search_query)
+            self.cache.compute(key, lambda: self.refresh(key, query))
+            self._count('warmed')
+        except Exception as e:
+            logger.warning(f"🔥 Pre-warming '{key}' failed: {e}")
+            self._count('failed')
         finally:
-            if self.driver:
-                try:
-                    logger.info("👋 Closing browser...")
-                    self.driver.quit()
-                except Exception:
-                    pass
-                time.sleep(0.5)
-        
-        # Filter valid products
-        valid_products = [p for p in all_products if p['price_num'] is not None and p['price_num'] >= 10]
-        valid_products.sort(key=lambda x: x['price_num'])
+            self._slots.release()
+
+    def run_once(self):
+        """Refresh every hot query that is due, within the concurrency and rate limits"""
+        self.last_run = time.time()
+        due = []
+        for key, query, _ in self.tracker.top(self.top_n):
+            if self.is_due(key):
+                due.append((key, query))
+            else:
+                self._count('skipped_fresh')
+        if not due:
+            return 0
         
-        logger.info(f"\n✅ Total products found: {len(valid_products)}")
-        return valid_products
+        logger.info(f"🔥 Pre-warming {len(due)} popular queries")
+        threads = []
+        next_start = time.monotonic()
+        for key, query in due:
+            # Nothing is queued ahead: each pre-warm waits for a free slot and its rate spacing, and only
+            # then checks for live traffic, so a burst that arrives meanwhile still defers it
+            self._slots.acquire()
+            time.sleep(max(0, next_start - time.monotonic()))
+            if self.is_busy():
+                self._slots.release()
+                deferred = len(due) - len(threads)
+                self._count('deferred', deferred)
+                logger.info(f"🔥 Busy serving searches, deferring {deferred} pre-warms")
+                break
+            thread = threading.Thread(target=self._warm, args=(key, query), name='prewarm', daemon=True)
+            thread.start()
+            threads.append(thread)
+            next_start = time.monotonic() + self.spacing
+        for thread in threads:
+            thread.join()
+        return len(threads)
+
+    def stats(self):
+        return {
+            'running': self._thread is not None,
+            'tracked_queries': len(self.tracker),
+            'top': [{'query': query, 'score': round(score, 2)} for _, query, score in self.tracker.top(5)],
+            'last_run': self.last_run,
+            **dict(self.counts),
+        }
+
+
+def create_cache_backend():
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteCacheBackend()
+    return MemoryCacheBackend()
 
 
 # Flask Application
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Enable CORS for frontend
 
+# Shared pool of warm browsers, reused across requests
+driver_pool = DriverPool(lambda: UniversalEcommerceScraper().create_driver())
+atexit.register(driver_pool.shutdown)
+
+# Browsers for /api/jobs, kept apart so background searches never take one from a live request
+job_driver_pool = DriverPool(lambda: UniversalEcommerceScraper().create_driver(), size=JOB_DRIVER_POOL_SIZE,
+                             blocking=True)
+atexit.register(job_driver_pool.shutdown)
+
+# Identical concurrent searches share a single scrape
+search_flights = SingleFlight()
+
+# Search results keyed by normalized query
+result_cache = ResultCache(create_cache_backend(), flights=search_flights)
+
+# Every scraped price, kept for history and price-drop queries
+price_history = PriceHistoryStore() if HISTORY_ENABLED else None
+if price_history:
+    atexit.register(price_history.close)
+
+# Sites that keep failing are skipped for a while instead of slowing every search down
+site_health = SiteHealth()
+
+# In worker mode, site scrapes run in separate worker processes instead of this one
+worker_broker = WorkerBroker() if SCRAPE_BACKEND == 'workers' else None
+
+
+def warm_driver_pool():
+    """Launch the pool's browsers in the background so the first searches don't pay for Chrome startup"""
+    if worker_broker:  # the workers own the browsers
+        return
+    threading.Thread(target=driver_pool.warm, daemon=True, name='driver-pool-warm').start()
+
+
+def cached_site_products(adapter, query):
+    """A site's products from the last cached search for query, at any age"""
+    for key in (search_key(query), search_key(query, [adapter])):
+        entry = result_cache.backend.get(key)
+        if entry is not None:
+            products = [p for p in entry[0]['products'] if p['source'] == adapter.name]
+            if products:
+                return products
+    return None
+
+
+def create_scraper(pool=None):
+    return UniversalEcommerceScraper(driver_pool=pool or driver_pool, price_history=price_history,
+                                     site_health=site_health, fallback=cached_site_products, broker=worker_broker)
+
+
+# Progress of the searches being scraped right now, so streams and jobs can follow one another's scrape
+live_searches = {}
+live_searches_lock = threading.Lock()
+
+
+def live_search(key):
+    """Progress of the in-flight scrape for key, created for the scrape that's about to start if there's none"""
+    with live_searches_lock:
+        progress = live_searches.get(key)
+        if progress is None or progress.finished:
+            progress = live_searches[key] = SearchProgress()
+        return progress
+
+
+def end_live_search(key, progress):
+    progress.finish()
+    with live_searches_lock:
+        if live_searches.get(key) is progress:
+            del live_searches[key]
+
+
+def run_search(query, sites=None, pool=None):
+    """Scrape the given sites for query and return the cacheable result plus its timing breakdown"""
+    key = search_key(query, sites)
+    progress = live_search(key)
+    scraper = create_scraper(pool)
+    scraper.timings = []
+    scraper.progress = progress
+    try:
+        products = scraper.compare_prices(query, sites)
+    finally:
+        end_live_search(key, progress)
+    with scraper.span('group'):
+        groups = group_products(products)
+    return {'products': products, 'sites': scraper.site_reports, 'groups': groups, 'timings': scraper.timings}
+
+
+def follow_search(key, query, sites=None, pool=None):
+    """Start or join the scrape for key; returns (site results as they finish, Future of the full result)"""
+    progress = live_search(key)
+    future = result_cache.start(key, lambda: run_search(query, sites, pool))
+    # A scrape that ended before this caller arrived never finishes the progress it was handed
+    future.add_done_callback(lambda f: end_live_search(key, progress))
+    return progress.follow(), future
+
+# Indexed views of cached result sets, keyed by (cache key, stored_at); merges drop a key's entries
+result_indexes = OrderedDict()
+result_indexes_lock = threading.Lock()
+
+
+def result_index(key, stored_at, products):
+    """Index for one stored version of a result set, built on first use"""
+    with result_indexes_lock:
+        index = result_indexes.get((key, stored_at))
+        if index is not None:
+            result_indexes.move_to_end((key, stored_at))
+            return index
+    index = ResultIndex(products)
+    with result_indexes_lock:
+        result_indexes[(key, stored_at)] = index
+        while len(result_indexes) > RESULT_INDEX_ENTRIES:
+            result_indexes.popitem(last=False)
+    return index
+
+
+# Recent versions of each search's products, for /api/search/changes
+result_snapshots = ResultSnapshots()
+
+
+def merge_cached_products(key, products, state, next_state):
+    """Add deep-mode products, and the cursor past their pages, to a cached result set without changing its age"""
+    entry = result_cache.backend.get(key)
+    if entry is None:
+        return
+    value, stored_at = entry
+    deep_state = dict(first_page_state(value))
+    for site in state:
+        if site in next_state:
+            deep_state[site] = next_state[site]
+        else:
+            deep_state.pop(site, None)
+    
+    seen = {(p['source'], p['title'], p['price_num']) for p in value['products']}
+    new = [p for p in products if (p['source'], p['title'], p['price_num']) not in seen]
+    merged = sorted(value['products'] + new, key=lambda x: x['price_num'])
+    groups = group_products(merged) if new else value.get('groups')
+    result_cache.backend.set(key, {**value, 'products': merged, 'groups': groups, 'deep_state': deep_state}, stored_at)
+    # The entry keeps its stored_at, so indexes built from the old product list have to go
+    with result_indexes_lock:
+        for index_key in [k for k in result_indexes if k[0] == key]:
+            del result_indexes[index_key]
+
+
+def first_page_state(result):
+    """Cursor state for the next pages of a result: where deep mode left off, else page 2 of each paginated site"""
+    if 'deep_state' in result:
+        return result['deep_state']
+    state = {}
+    for adapter in site_registry.all():
+        report = result['sites'].get(adapter.name)
+        if adapter.page_template and report and report['status'] == 'ok':
+            prices = sorted(p['price_num'] for p in result['products'] if p['source'] == adapter.name)
+            state[adapter.name] = {'page': 2, 'top': prices[:DEEP_TOP_K]}
+    return state
+
+
+def run_deep(query, state, pages=DEEP_MAX_PAGES, key=None, sites=None):
+    """Scrape the next result pages named by a cursor state into key's cached result; returns (products, next_cursor, reports)"""
+    scraper = create_scraper()
+    products, next_state, reports = scraper.deep_scrape(query, state, pages)
+    if key is not None:
+        merge_cached_products(key, products, state, next_state)
+    return products, encode_cursor(query, next_state, sites), reports
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+def stream_search(query, site_filter=None):
+    """Yield SSE messages for each site as it finishes, then a merged summary"""
+    started = time.monotonic()
+    adapters = site_filter or site_registry.all()
+    sites = [a.name for a in adapters]
+    yield sse_event('progress', {'query': query, 'completed': 0, 'total': len(sites), 'sites': sites})
+    
+    key = search_key(query, site_filter)
+    cached = result_cache.peek(key)
+    if cached is not None:
+        result, cache_status, cached_at = cached
+        if cache_status == 'stale':
+            result_cache.refresh_in_background(key, lambda: run_search(query, site_filter))
+        for site in sites:
+            products = [p for p in result['products'] if p['source'] == site]
+            yield sse_event('site', {'site': site, 'products': products, 'report': result['sites'].get(site)})
+        yield sse_event('summary', {
+            'query': query,
+            'total_products': len(result['products']),
+            'products': result['products'],
+            'sites': result['sites'],
+            'groups': result.get('groups') or group_products(result['products']),
+            'cache': {'status': cache_status, 'cached_at': cached_at},
+            'next_cursor': encode_cursor(query, first_page_state(result), site_filter),
+            'elapsed': round(time.monotonic() - started, 2)
+        })
+        return
+    
+    # Joins a scrape already running for this search (from any endpoint) instead of starting another
+    site_results, future = follow_search(key, query, site_filter)
+    streamed = set()
+    for site, products, report in site_results:
+        streamed.add(site)
+        yield sse_event('site', {'site': site, 'products': products, 'report': report})
+        yield sse_event('progress', {
+            'query': query,
+            'completed': len(streamed),
+            'total': len(sites),
+            'site': site,
+            'elapsed': round(time.monotonic() - started, 2)
+        })
+    
+    try:
+        result, stored_at = future.result(timeout=SEARCH_WAIT_TIMEOUT)
+    except FutureTimeoutError:
+        raise SearchTimeout(f"Search for '{key}' is still running, try again shortly")
+    # Sites that finished before this stream joined
+    for site in sites:
+        if site not in streamed:
+            products = [p for p in result['products'] if p['source'] == site]
+            yield sse_event('site', {'site': site, 'products': products, 'report': result['sites'].get(site)})
+    
+    yield sse_event('summary', {
+        'query': query,
+        'total_products': len(result['products']),
+        'products': result['products'],
+        'sites': result['sites'],
+        'groups': result['groups'],
+        'cache': {'status': 'miss', 'cached_at': stored_at},
+        'next_cursor': encode_cursor(query, first_page_state(result), site_filter),
+        'elapsed': round(time.monotonic() - started, 2)
+    })
+
+def run_job(job):
+    """Run a queued search, publishing each site's products on the job as it finishes"""
+    key = search_key(job.query, job.site_filter)
+    cached = result_cache.peek(key)
+    if cached is not None:
+        result, cache_status, cached_at = cached
+        job.products = result['products']
+        job.sites = result['sites']
+        job.groups = result.get('groups') or group_products(result['products'])
+        job.cache = {'status': cache_status, 'cached_at': cached_at}
+        return
+    
+    # A job that starts the scrape runs it on the job browsers; one that joins a live search doesn't scrape at all
+    site_results, future = follow_search(key, job.query, job.site_filter, job_driver_pool)
+    all_products = []
+    for site, products, report in site_results:
+        all_products = sorted(all_products + products, key=lambda x: x['price_num'])
+        job.products = all_products
+        job.sites[site] = report
+        if job.cancelled.is_set():
+            # The shared scrape carries on and still fills the cache
+            logger.info(f"🛑 Job {job.id} cancelled")
+            return
+    
+    try:
+        result, stored_at = future.result(timeout=SEARCH_WAIT_TIMEOUT)
+    except FutureTimeoutError:
+        raise SearchTimeout(f"Search for '{key}' is still running")
+    job.products = result['products']
+    job.sites = dict(result['sites'])
+    job.groups = result['groups']
+    job.cache = {'status': 'miss', 'cached_at': stored_at}
+
+
+# Browser-heavy searches queued through /api/jobs
+job_queue = JobQueue(run_job)
+
+
+def pool_saturated():
+    """True while live searches hold every browser or jobs are waiting for a worker"""
+    if worker_broker:
+        return worker_broker.saturated() or job_queue.stats()['queued'] > 0
+    stats = driver_pool.stats()
+    return (stats['total'] >= stats['size'] and stats['idle'] == 0) or job_queue.stats()['queued'] > 0
+
+
+# Hot queries from /api/search traffic, re-scraped before their cache entries expire
+query_tracker = QueryTracker()
+prewarmer = Prewarmer(query_tracker, result_cache,
+                      lambda key, query: run_search(query, pool=job_driver_pool),
+                      is_busy=pool_saturated)
+
+
+def track_query(query):
+    if PREWARM_ENABLED:
+        query_tracker.record(query)
+        prewarmer.start()
+
+metrics.gauge('pricewise_driver_pool_browsers', 'Browsers in the driver pool by state', lambda: {
+    (('state', 'idle'),): driver_pool.stats()['idle'],
+    (('state', 'in_use'),): driver_pool.stats()['in_use'],
+})
+metrics.gauge('pricewise_jobs_queued', 'Search jobs waiting for a worker', lambda: {(): job_queue.stats()['queued']})
+metrics.gauge('pricewise_site_circuit_open', 'Whether a site is currently skipped by its circuit breaker', lambda: {
+    (('site', site),): int(stats['state'] == 'open') for site, stats in site_health.stats().items()
+})
+metrics.gauge('pricewise_searches_in_flight', 'Distinct searches currently being scraped', lambda: {(): search_flights.in_flight()})
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unknown'
+        metrics.observe('pricewise_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc('pricewise_requests_total', endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip or brotli encode JSON bodies for clients that accept it"""
+    if (response.is_streamed or response.direct_passthrough or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = 'identity'
+    if RESPONSE_COMPRESSION and len(body) >= COMPRESS_MIN_BYTES:
+        accepted = request.accept_encodings
+        if brotli and accepted['br']:
+            encoding, body = 'br', brotli.compress(body, quality=BROTLI_QUALITY)
+        elif accepted['gzip']:
+            encoding, body = 'gzip', gzip.compress(body, compresslevel=GZIP_LEVEL)
+    
+    if encoding != 'identity':
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    metrics.observe('pricewise_response_bytes', len(body), endpoint=request.endpoint or 'unknown', encoding=encoding)
+    return response
+
 @app.route('/')
 def home():
     """Health check endpoint"""
@@ -543,18 +3009,98 @@ def home():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, with each site's breaker state and recent success rate"""
+    sites = site_health.stats()
+    open_sites = [site for site, stats in sites.items() if stats['state'] != 'closed']
+    return jsonify({
+        'status': 'degraded' if open_sites else 'healthy',
+        'message': f"Skipping {', '.join(open_sites)}" if open_sites else 'Server is running',
+        'sites': sites,
+        'driver_pool': driver_pool.stats(),
+        'jobs': {**job_queue.stats(), 'driver_pool': job_driver_pool.stats()},
+        'prewarm': prewarmer.stats(),
+        'workers': worker_broker.stats() if worker_broker else None
+    }), 200
+
+def _site_filter(value):
+    """Adapters for a list or comma-separated string of site names, or None for every site"""
+    if not value:
+        return None
+    names = value.split(',') if isinstance(value, str) else value
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise UnknownSite("Sites must be a list of site names")
+    names = [name for name in names if name.strip()]
+    return site_registry.select(names) if names else None
+
+def _unknown_site(e):
+    return jsonify({
+        'error': str(e),
+        'available_sites': [a.name for a in site_registry.all()],
+        'products': []
+    }), 400
+
+def _result_view(data):
+    """Filter, sort and page options from the JSON body or query string, or None for the full list"""
+    def param(name):
+        value = data.get(name)
+        return request.args.get(name) if value is None else value
+    
+    raw = {name: param(name) for name in ('source', 'category', 'min_price', 'max_price', 'sort', 'page', 'limit')}
+    if all(value in (None, '', 'all') for value in raw.values()):
+        return None
+    for name in ('source', 'category', 'sort'):
+        if raw[name] is not None and not isinstance(raw[name], str):
+            raise ValueError(f"{name} must be a string")
+    
+    view = {
+        'source': raw['source'] if raw['source'] not in (None, '', 'all') else None,
+        'category': raw['category'] if raw['category'] not in (None, '', 'all') else None,
+        'sort': raw['sort'] or 'price-asc',
+    }
+    if view['sort'] not in RESULT_SORTS:
+        raise ValueError(f"Sort must be one of {', '.join(RESULT_SORTS)}")
+    for name in ('min_price', 'max_price'):
+        try:
+            view[name] = float(raw[name]) if raw[name] not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number")
+    try:
+        view['page'] = max(1, int(raw['page'] or 1))
+        view['limit'] = min(RESULT_MAX_LIMIT, max(1, int(raw['limit']))) if raw['limit'] else RESULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise ValueError("page and limit must be integers")
+    return view
+
+def _product_encoding(data):
+    """Projected fields and layout for product lists from the JSON body or query string"""
+    fields = data.get('fields') or request.args.get('fields')
+    layout = data.get('format') or request.args.get('format') or 'rows'
+    if fields:
+        names = fields.split(',') if isinstance(fields, str) else fields
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError("fields must be a list or comma-separated string of field names")
+        fields = [name.strip() for name in names if name.strip()]
+        unknown = [name for name in fields if name not in PRODUCT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(PRODUCT_FIELDS)}")
+    if layout not in PRODUCT_LAYOUTS:
+        raise ValueError(f"format must be one of {', '.join(PRODUCT_LAYOUTS)}")
+    return fields or None, layout
+
+@app.route('/api/sites', methods=['GET'])
+def list_sites():
+    """Sites currently loaded from the site definitions"""
     return jsonify({
-        'status': 'healthy',
-        'message': 'Server is running'
+        'sites': [a.to_dict() for a in site_registry.all()]
     }), 200
 
 @app.route('/api/search', methods=['POST'])
 def search_products():
-    """Search products across all platforms"""
+    """Search products across all platforms, or the subset named in 'sites'"""
     try:
         data = request.json
         query = data.get('query', '').strip()
+        include_timings = bool(data.get('timings')) or request.args.get('timings') == '1'
         
         if not query:
             return jsonify({
@@ -562,20 +3108,249 @@ def search_products():
                 'products': []
             }), 400
         
+        try:
+            site_filter = _site_filter(data.get('sites') or request.args.get('sites'))
+        except UnknownSite as e:
+            return _unknown_site(e)
+        
+        try:
+            deep_pages = min(DEEP_MAX_PAGES, max(1, int(data.get('pages') or DEEP_MAX_PAGES)))
+        except (TypeError, ValueError):
+            return jsonify({
+                'error': 'Pages must be an integer',
+                'products': []
+            }), 400
+        
+        try:
+            view = _result_view(data)
+            fields, layout = _product_encoding(data)
+        except ValueError as e:
+            return jsonify({
+                'error': str(e),
+                'products': []
+            }), 400
+        
         logger.info(f"\n📡 API Request received for: {query}")
+        request_start = time.perf_counter()
+        # Re-reads of a finished search (filter and page changes) aren't new demand
+        if site_filter is None and view is None:
+            track_query(query)
         
-        scraper = UniversalEcommerceScraper()
-        products = scraper.compare_prices(query)
+        key = search_key(query, site_filter)
+        result, cache_status, cached_at = result_cache.get_or_compute(
+            key, lambda: run_search(query, site_filter)
+        )
+        products = result['products']
+        groups = result.get('groups')
         
-        logger.info(f"✅ Returning {len(products)} products to frontend\n")
+        # Deep mode walks further result pages now; otherwise the cursor lets the client ask later
+        state = first_page_state(result)
+        deep = None
+        if data.get('deep') and state:
+            more, next_cursor, deep = run_deep(query, state, deep_pages, key, site_filter)
+            products = sorted(products + more, key=lambda x: x['price_num'])
+            groups = None
+        else:
+            next_cursor = encode_cursor(query, state, site_filter)
         
-        return jsonify({
+        version = result_snapshots.record(key, products)
+        
+        # Deep results aren't cached yet, so their index is built for this response only
+        index = ResultIndex(products) if deep is not None else result_index(key, cached_at, products)
+        if view:
+            page_products, total, facets = index.query(**view)
+        else:
+            page_products, total, facets = products, len(products), index.query()[2]
+        
+        logger.info(f"✅ Returning {len(page_products)} of {total} products to frontend ({cache_status})\n")
+        
+        response = {
             'success': True,
             'query': query,
-            'total_products': len(products),
-            'products': products
-        }), 200
+            'total_products': total,
+            'products': encode_products(page_products, fields, layout),
+            'facets': facets,
+            'sites': result['sites'],
+            'cache': {'status': cache_status, 'cached_at': cached_at},
+            'next_cursor': next_cursor,
+            'version': version
+        }
+        if view:
+            response['page'] = view['page']
+            response['limit'] = view['limit']
+        else:
+            # Group offers index into the full product list, so they only make sense unfiltered
+            response['groups'] = groups or group_products(products)
+        if deep is not None:
+            response['deep'] = deep
+        if include_timings:
+            response['timings'] = {
+                'total': round(time.perf_counter() - request_start, 4),
+                # Spans only exist for the scrape this request waited on, not for cache hits
+                'spans': result.get('timings', []) if cache_status == 'miss' else []
+            }
+        return jsonify(response), 200, {'ETag': f'"{version}"'}
+    
+    except DriverPoolExhausted as e:
+        logger.warning(f"⏳ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 503
+    
+    except SearchTimeout as e:
+        logger.warning(f"⏳ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 504
+    
+    except Exception as e:
+        logger.error(f"❌ Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 500
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/search/stream', methods=['GET'])
+def search_products_stream():
+    """Stream each platform's products over Server-Sent Events as soon as it finishes"""
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({
+            'error': 'Search query is required',
+            'products': []
+        }), 400
+    
+    try:
+        site_filter = _site_filter(request.args.get('sites'))
+    except UnknownSite as e:
+        return _unknown_site(e)
+    
+    logger.info(f"\n📡 Streaming API Request received for: {query}")
+    if site_filter is None:
+        track_query(query)
+    
+    def generate():
+        try:
+            yield from stream_search(query, site_filter)
+        except Exception as e:
+            logger.error(f"❌ Error: {str(e)}")
+            yield sse_event('error', {'error': str(e)})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/search/more', methods=['GET'])
+def search_more():
+    """Next result pages for a search, continuing from the cursor an earlier response returned"""
+    token = request.args.get('cursor', '').strip()
+    
+    if not token:
+        return jsonify({
+            'error': 'Cursor is required',
+            'products': []
+        }), 400
+    
+    try:
+        query, state, site_filter = decode_cursor(token)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'products': []
+        }), 400
+    
+    try:
+        fields, layout = _product_encoding({})
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'products': []
+        }), 400
+    
+    pages = min(DEEP_MAX_PAGES, max(1, _int_arg('pages', DEEP_MAX_PAGES)))
+    logger.info(f"\n📡 More results requested for: {query} ({', '.join(state)})")
+    
+    try:
+        products, next_cursor, reports = run_deep(query, state, pages, search_key(query, site_filter), site_filter)
+    except Exception as e:
+        logger.error(f"❌ Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'total_products': len(products),
+        'products': encode_products(products, fields, layout),
+        'sites': reports,
+        'next_cursor': next_cursor
+    }), 200
+
+@app.route('/api/search/changes', methods=['GET'])
+def search_changes():
+    """Products added, removed or repriced since the version a client last saw (since= or If-None-Match)"""
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({
+            'error': 'Search query is required',
+            'products': []
+        }), 400
+    
+    try:
+        site_filter = _site_filter(request.args.get('sites'))
+    except UnknownSite as e:
+        return _unknown_site(e)
+    
+    try:
+        fields, layout = _product_encoding({})
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'products': []
+        }), 400
+    # Diffs are matched up by id, so it's always sent
+    if fields and 'id' not in fields:
+        fields = ['id'] + fields
+    
+    since = request.args.get('since') or next(iter(request.if_none_match), None)
+    logger.info(f"\n📡 Changes requested for: {query} (since {since or 'start'})")
     
+    try:
+        key = search_key(query, site_filter)
+        result, cache_status, cached_at = result_cache.get_or_compute(
+            key, lambda: run_search(query, site_filter)
+        )
+        version = result_snapshots.record(key, result['products'])
+    except DriverPoolExhausted as e:
+        logger.warning(f"⏳ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 503
+    except SearchTimeout as e:
+        logger.warning(f"⏳ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'products': []
+        }), 504
     except Exception as e:
         logger.error(f"❌ Error: {str(e)}")
         return jsonify({
@@ -583,6 +3358,139 @@ def search_products():
             'error': str(e),
             'products': []
         }), 500
+    
+    etag = {'ETag': f'"{version}"'}
+    if since == version:
+        return '', 304, etag
+    
+    response = {
+        'success': True,
+        'query': query,
+        'version': version,
+        'since': since,
+        'cache': {'status': cache_status, 'cached_at': cached_at}
+    }
+    changes = result_snapshots.diff(key, since, version) if since else None
+    if changes is None:
+        # Unknown or expired version: the client has to start over from the full list
+        response['full'] = True
+        response['products'] = encode_products(result['products'], fields, layout)
+    else:
+        added, removed, changed, previous = changes
+        response['full'] = False
+        response['added'] = encode_products(added, fields, layout)
+        response['removed'] = removed
+        response['changed'] = encode_products(changed, fields, layout)
+        response['previous_prices'] = previous
+    return jsonify(response), 200, etag
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a search in the background and return its job id"""
+    data = request.json or {}
+    query = data.get('query', '').strip()
+    
+    if not query:
+        return jsonify({
+            'error': 'Search query is required'
+        }), 400
+    
+    try:
+        priority = min(9, max(0, int(data.get('priority', JOB_DEFAULT_PRIORITY))))
+    except (TypeError, ValueError):
+        return jsonify({
+            'error': 'Priority must be an integer between 0 and 9'
+        }), 400
+    
+    try:
+        site_filter = _site_filter(data.get('sites'))
+    except UnknownSite as e:
+        return _unknown_site(e)
+    
+    try:
+        job = job_queue.submit(query, priority, site_filter)
+    except JobQueueFull as e:
+        logger.warning(f"⏳ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 429
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job's status and the products found so far"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Job not found'
+        }), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Job not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status
+    }), 200
+
+def _history_unavailable():
+    return jsonify({
+        'error': 'Price history is disabled'
+    }), 404
+
+def _int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+@app.route('/api/history', methods=['GET'])
+def get_price_history():
+    """Price observations for a product over the last N days"""
+    if not price_history:
+        return _history_unavailable()
+    
+    title = request.args.get('title', '').strip()
+    if not title:
+        return jsonify({
+            'error': 'Product title is required'
+        }), 400
+    
+    key = product_key(title)
+    days = _int_arg('days', 30)
+    return jsonify({
+        'product_key': key,
+        'days': days,
+        'history': price_history.history(key, request.args.get('source'), days),
+        'range': price_history.price_range(key, days)
+    }), 200
+
+@app.route('/api/price-drops', methods=['GET'])
+def get_price_drops():
+    """Products whose latest price dropped below their recent peak"""
+    if not price_history:
+        return _history_unavailable()
+    
+    days = _int_arg('days', 7)
+    min_drop = _int_arg('min_drop', 5)
+    return jsonify({
+        'days': days,
+        'min_drop_pct': min_drop,
+        'drops': price_history.price_drops(days, min_drop, _int_arg('limit', 50))
+    }), 200
 
 if __name__ == '__main__':
     print("\n" + "="*60)
@@ -593,7 +3501,23 @@ if __name__ == '__main__':
     print("📝 Endpoints:")
     print("   - GET  /               : Health check")
     print("   - GET  /api/health     : Health status")
+    print("   - GET  /api/sites      : Registered sites")
     print("   - POST /api/search     : Search products")
+    print("   - GET  /api/search/stream?q= : Stream results per platform (SSE)")
+    print("   - GET  /api/search/more?cursor= : Next result pages")
+    print("   - GET  /api/search/changes?q=&since= : What changed since a version")
+    print("   - GET  /metrics        : Prometheus metrics")
+    print("   - GET  /api/history?title= : Price history for a product")
+    print("   - GET  /api/price-drops : Recent price drops")
+    print("   - POST /api/jobs       : Queue a background search")
+    print("   - GET  /api/jobs/<id>  : Job status and results")
+    print("   - DELETE /api/jobs/<id> : Cancel a job")
+    if worker_broker:
+        print("🧵 Scraping on worker processes: run `python worker.py` to add capacity")
     print("="*60 + "\n")
     
+    # With the debug reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_driver_pool()
+    
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,413 @@
+"""Offline benchmarks for the search pipeline.
+
+Usage:
+    python benchmark.py classify [--titles 5000]
+    python benchmark.py match [--titles 3000]
+    python benchmark.py record --query "iphone 15" [--site Amazon ...]
+    python benchmark.py scrapers [--browser [--no-block]] [--update-baseline]
+
+`record` snapshots live search pages into fixtures/; `scrapers` replays them through the
+parsing layer (or, with --browser, headless Chrome via a local static server) and exits
+non-zero when cards found, field fill rate or throughput regress against fixtures/baseline.json.
+Browser rows also report bytes transferred; --no-block loads every resource for comparison.
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import app
+from app import (STOP_WORDS, PooledDriver, UniversalEcommerceScraper, extract_cards_html, group_products,
+                 product_classifier, site_registry)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_PATH = os.path.join(FIXTURES_DIR, 'baseline.json')
+
+BRANDS = ['Apple', 'Samsung', 'OnePlus', 'Google', 'Sony', 'boAt', 'Lenovo', 'HP', 'Puma', 'Prestige']
+NOUNS = ['iPhone 15', 'Galaxy S24', 'Nord CE 3', 'Pixel 8', 'WH-1000XM5 Headphones', 'Airdopes Earbuds',
+         'IdeaPad Laptop', 'Smart TV 43 inch', 'Running Shoes', 'Mixer Grinder', 'Back Cover Case',
+         'Tempered Glass Screen Protector', 'Smartwatch', 'Cotton T-Shirt', 'Slim Fit Jeans']
+EXTRAS = ['(128 GB)', '(Black)', '8GB RAM', '5G', 'with Charger', 'Pack of 2', 'for Men', '2024 Edition']
+QUERIES = ['iphone 15', 'samsung galaxy s24', 'sony headphones', 'running shoes for men', 'smart tv']
+
+
+def synthetic_titles(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        ' '.join([rng.choice(BRANDS), rng.choice(NOUNS)] + rng.sample(EXTRAS, rng.randint(0, 3)))
+        for _ in range(count)
+    ]
+
+
+def legacy_categorize(title):
+    """The per-call dict scan categorization used to do, kept as a baseline"""
+    title_lower = title.lower()
+    categories = {
+        "Mobile Phones": ['phone', 'mobile', 'iphone', 'samsung', 'oneplus', 'pixel'],
+        "Laptops": ['laptop', 'notebook', 'macbook', 'chromebook'],
+        "Television": ['tv', 'television', 'smart tv', 'led tv'],
+        "Audio Accessories": ['headphone', 'earphone', 'earbud', 'airpods'],
+        "Mobile Accessories": ['charger', 'cable', 'adapter', 'power bank'],
+        "Wearables": ['watch', 'smartwatch', 'fitness band'],
+        "Cameras": ['camera', 'dslr', 'gopro'],
+        "Apparel": ['shirt', 't-shirt', 'tshirt', 'polo', 'top', 'blouse', 'hoodie', 'sweatshirt'],
+        "Bottoms": ['jeans', 'trouser', 'pant', 'cargo', 'chino'],
+        "Footwear": ['shoe', 'sneaker', 'boot', 'sandal', 'slipper', 'footwear'],
+        "Kitchen Appliances": ['mixer', 'grinder', 'blender', 'juicer', 'cooker'],
+        "Furniture": ['sofa', 'chair', 'table', 'bed', 'mattress'],
+        "Personal Care": ['shampoo', 'conditioner', 'hair oil', 'soap', 'facewash'],
+        "Beauty & Cosmetics": ['makeup', 'lipstick', 'kajal', 'mascara', 'foundation'],
+    }
+    for category, keywords in categories.items():
+        if any(word in title_lower for word in keywords):
+            return category
+    return "General Products"
+
+
+def legacy_is_relevant(title, search_query):
+    """The per-call substring relevance check, kept as a baseline"""
+    if not title or len(title) < 3:
+        return False
+    title_lower = title.lower()
+    query_lower = search_query.lower()
+    main_device_keywords = ['iphone', 'phone', 'mobile', 'samsung', 'pixel', 'oneplus']
+    accessory_keywords = ['cover', 'case', 'protector', 'screen guard', 'tempered glass', 'pouch', 'skin']
+    if any(dev in query_lower for dev in main_device_keywords):
+        if any(acc in title_lower for acc in accessory_keywords):
+            return False
+    query_words = [word for word in query_lower.split() if len(word) > 2 and word not in STOP_WORDS]
+    if not query_words:
+        return False
+    match_count = sum(1 for word in query_words if word in title_lower)
+    return match_count >= len(query_words) / 2
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def report(label, count, elapsed):
+    print(f"  {label:<30} {elapsed * 1000:9.1f} ms  {count / elapsed:12,.0f} titles/s")
+
+
+MATCH_PRODUCTS = [
+    ('Apple', 'iPhone', ['13', '14', '15', '16'], ['', 'Plus', 'Pro', 'Pro Max']),
+    ('Samsung', 'Galaxy', ['S22', 'S23', 'S24', 'A15', 'A35', 'M34'], ['', 'Plus', 'Ultra', 'FE']),
+    ('OnePlus', 'Nord', ['CE 3', 'CE 4', '3', '4'], ['', 'Lite']),
+    ('Google', 'Pixel', ['7', '7a', '8', '8a', '9'], ['', 'Pro']),
+    ('Xiaomi', 'Redmi Note', ['12', '13', '14'], ['', 'Pro', 'Pro Plus']),
+    ('Vivo', 'V', ['27', '29', '30'], ['', 'Pro']),
+    ('Realme', 'Narzo', ['60', '70', '80'], ['', 'Pro']),
+    ('Motorola', 'Edge', ['40', '50'], ['', 'Neo', 'Pro']),
+]
+STORAGES = [64, 128, 256, 512]
+COLORS = ['Black', 'Blue', 'Midnight', 'Starlight', 'Green', 'Titanium Grey', 'Phantom Black']
+SOURCES = ['Flipkart', 'Amazon', 'Vijay Sales', 'JioMart']
+
+
+def synthetic_listings(count, seed=7):
+    """Listings for random catalogue products, phrased the way each site tends to"""
+    rng = random.Random(seed)
+    catalogue = [
+        (brand, line, model, variant, storage)
+        for brand, line, models, variants in MATCH_PRODUCTS
+        for model in models for variant in variants for storage in STORAGES
+    ]
+    products, truth = [], []
+    for i in range(count):
+        product_id = rng.randrange(len(catalogue))
+        brand, line, model, variant, storage = catalogue[product_id]
+        name = ' '.join(part for part in [line, model, variant] if part)
+        color = rng.choice(COLORS)
+        style = rng.randrange(4)
+        if style == 0:
+            title = f"{brand} {name} ({color}, {storage} GB)"
+        elif style == 1:
+            title = f"{brand} {name} 5G ({rng.choice([6, 8, 12])}GB RAM, {storage}GB Storage) - {color}"
+        elif style == 2:
+            title = f"{name} {storage}GB {color}"
+        else:
+            title = f"{brand.upper()} {name} | {color} | {storage} GB ROM"
+        products.append({
+            'title': title,
+            'price': f"₹{rng.randint(10000, 150000):,}",
+            'price_num': rng.randint(10000, 150000),
+            'source': rng.choice(SOURCES),
+            'url': f"https://example.com/p/{i}",
+        })
+        truth.append(product_id)
+    return products, truth
+
+
+def pair_count(n):
+    return n * (n - 1) // 2
+
+
+def bench_match(args):
+    for count in (args.titles, args.titles * 2):
+        products, truth = synthetic_listings(count)
+        groups, elapsed = timed(lambda: group_products(products))
+
+        # Pairwise precision/recall from the contingency table, without comparing all pairs
+        predicted = [0] * len(products)
+        for group_id, group in enumerate(groups):
+            for index in group['offers']:
+                predicted[index] = group_id
+        same_both = sum(pair_count(n) for n in Counter(zip(predicted, truth)).values())
+        same_predicted = sum(pair_count(n) for n in Counter(predicted).values())
+        same_truth = sum(pair_count(n) for n in Counter(truth).values())
+        precision = same_both / same_predicted if same_predicted else 1.0
+        recall = same_both / same_truth if same_truth else 1.0
+
+        print(f"Matching {count} listings ({len(set(truth))} distinct products)")
+        report("group_products", count, elapsed)
+        print(f"  {len(groups)} groups, pairwise precision {precision:.3f}, recall {recall:.3f}")
+
+
+def bench_classify(args):
+    titles = synthetic_titles(args.titles)
+    print(f"Classifying {len(titles)} titles against {len(QUERIES)} queries")
+
+    legacy, elapsed = timed(lambda: [legacy_categorize(t) for t in titles])
+    report("categorize (legacy)", len(titles), elapsed)
+    compiled, elapsed = timed(lambda: product_classifier.categorize_many(titles))
+    report("categorize (compiled)", len(titles), elapsed)
+    changed = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"  {changed} titles categorized differently (word-boundary matching)")
+
+    total = len(titles) * len(QUERIES)
+    _, elapsed = timed(lambda: [(legacy_categorize(t), legacy_is_relevant(t, q)) for q in QUERIES for t in titles])
+    report("classify + relevance (legacy)", total, elapsed)
+    _, elapsed = timed(lambda: [product_classifier.classify_many(titles, q) for q in QUERIES])
+    report("classify_many (compiled)", total, elapsed)
+
+
+def slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def load_fixtures(sites=None):
+    """Yield (adapter, query, html_path) for every recorded page"""
+    if not os.path.isdir(FIXTURES_DIR):
+        return
+    for adapter in site_registry.select(sites):
+        site_dir = os.path.join(FIXTURES_DIR, slug(adapter.name))
+        if not os.path.isdir(site_dir):
+            continue
+        for name in sorted(os.listdir(site_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(site_dir, name), encoding='utf-8') as f:
+                    meta = json.load(f)
+                yield adapter, meta['query'], os.path.join(site_dir, name[:-5] + '.html')
+
+
+def bench_record(args):
+    scraper = UniversalEcommerceScraper()
+    scraper.create_driver()
+    try:
+        for adapter in site_registry.select(args.site):
+            site = adapter.name
+            url = adapter.search_url(args.query)
+            scraper.open_page(url)
+            scraper.wait_for_products(adapter)
+            site_dir = os.path.join(FIXTURES_DIR, slug(site))
+            os.makedirs(site_dir, exist_ok=True)
+            path = os.path.join(site_dir, slug(args.query))
+            with open(path + '.html', 'w', encoding='utf-8') as f:
+                f.write(scraper.driver.page_source)
+            with open(path + '.json', 'w', encoding='utf-8') as f:
+                json.dump({'site': site, 'query': args.query, 'url': url, 'recorded_at': time.time()}, f, indent=2)
+            print(f"  saved {site} -> {os.path.relpath(path, FIXTURES_DIR)}.html")
+    finally:
+        scraper.driver.quit()
+
+
+def fill_rate(products, url):
+    """Share of optional fields (rating, image, product link) that were extracted"""
+    if not products:
+        return 0.0
+    filled = sum(
+        (p['rating'] != "N/A") + (p['image'] != "N/A") + (p['url'] != url)
+        for p in products
+    )
+    return filled / (3 * len(products))
+
+
+def replay_parse(adapter, query, path, repeat):
+    """Run the static parsing layer over a fixture; returns a result row"""
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    scraper = UniversalEcommerceScraper()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cards = extract_cards_html(html, adapter.cards)
+        products = scraper.build_products(adapter, cards, query, path)
+        timings.append(time.perf_counter() - start)
+
+    # Measured separately, tracing slows the timed runs down several times over
+    tracemalloc.start()
+    scraper.build_products(adapter, extract_cards_html(html, adapter.cards), query, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'cards': len(cards),
+        'products': len(products),
+        'fill_rate': round(fill_rate(products, path), 3),
+        'seconds': statistics.median(timings),
+        'peak_mb': round(peak / (1024 * 1024), 2),
+        'kb': None,
+    }
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures():
+    """Serve the fixtures directory on a free local port; returns (server, base_url)"""
+    handler = functools.partial(_QuietHandler, directory=FIXTURES_DIR)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def replay_browser(scraper, base_url, adapter, query, path):
+    """Load a fixture in headless Chrome and run the full browser scrape on it"""
+    url = f"{base_url}/{os.path.relpath(path, FIXTURES_DIR).replace(os.sep, '/')}"
+    start = time.perf_counter()
+    products = scraper.scrape_page(adapter, url, query)
+    elapsed = time.perf_counter() - start
+    memory = PooledDriver(scraper.driver).memory_mb()
+    return {
+        'cards': scraper.count_cards(adapter),
+        'products': len(products),
+        'fill_rate': round(fill_rate(products, url), 3),
+        'seconds': elapsed,
+        'peak_mb': round(memory, 1) if memory is not None else None,
+        'kb': round(scraper.page_stats['bytes'] / 1024, 1) if scraper.page_stats else None,
+    }
+
+
+def check_regressions(mode, results, baseline, tolerance, slowdown):
+    """Compare results with the saved baseline; returns a list of failure messages"""
+    failures = []
+    for key, row in results.items():
+        expected = baseline.get(mode, {}).get(key)
+        if expected is None:
+            continue
+        if row['products'] < expected['products'] * (1 - tolerance):
+            failures.append(f"{key}: {row['products']} products, baseline {expected['products']}")
+        if row['fill_rate'] < expected['fill_rate'] - tolerance:
+            failures.append(f"{key}: fill rate {row['fill_rate']}, baseline {expected['fill_rate']}")
+        if row['seconds'] > expected['seconds'] * slowdown:
+            failures.append(f"{key}: {row['seconds'] * 1000:.1f} ms, baseline {expected['seconds'] * 1000:.1f} ms")
+        if row.get('kb') and expected.get('kb') and row['kb'] > expected['kb'] * slowdown:
+            failures.append(f"{key}: {row['kb']:.0f} KB transferred, baseline {expected['kb']:.0f} KB")
+    return failures
+
+
+def bench_scrapers(args):
+    fixtures = list(load_fixtures(args.site))
+    if not fixtures:
+        sys.exit(f"No fixtures in {FIXTURES_DIR}; record some with `python benchmark.py record --query ...`")
+
+    mode = 'parse'
+    if args.browser:
+        mode = 'browser-unblocked' if args.no_block else 'browser'
+    results = {}
+    scraper = server = None
+    if args.browser:
+        if args.no_block:
+            app.BLOCK_RESOURCES = app.BLOCK_IMAGES = False
+        server, base_url = serve_fixtures()
+        scraper = UniversalEcommerceScraper()
+        scraper.create_driver()
+
+    print(f"Replaying {len(fixtures)} fixtures ({mode})")
+    print(f"  {'fixture':<32} {'cards':>5} {'kept':>5} {'fill':>6} {'ms':>9} {'peak MB':>8} {'KB':>8}")
+    try:
+        for adapter, query, path in fixtures:
+            if args.browser:
+                row = replay_browser(scraper, base_url, adapter, query, path)
+            else:
+                row = replay_parse(adapter, query, path, args.repeat)
+            key = f"{adapter.name}/{query}"
+            results[key] = row
+            print(f"  {key:<32} {row['cards']:>5} {row['products']:>5} {row['fill_rate']:>6.2f} "
+                  f"{row['seconds'] * 1000:>9.1f} {row['peak_mb'] if row['peak_mb'] is not None else '-':>8} "
+                  f"{row['kb'] if row['kb'] is not None else '-':>8}")
+    finally:
+        if scraper:
+            scraper.driver.quit()
+        if server:
+            server.shutdown()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline[mode] = results
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return
+
+    failures = check_regressions(mode, results, baseline, args.tolerance, args.slowdown)
+    if failures:
+        print("REGRESSIONS:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("No regressions" if baseline.get(mode) else "No baseline yet; run with --update-baseline")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    classify = subparsers.add_parser('classify', help='categorization and relevance throughput')
+    classify.add_argument('--titles', type=int, default=5000)
+    classify.set_defaults(func=bench_classify)
+
+    match = subparsers.add_parser('match', help='cross-site grouping speed and accuracy')
+    match.add_argument('--titles', type=int, default=3000)
+    match.set_defaults(func=bench_match)
+
+    record = subparsers.add_parser('record', help='snapshot live search pages into fixtures/')
+    record.add_argument('--query', required=True)
+    record.add_argument('--site', action='append', choices=[a.name for a in site_registry.all()])
+    record.set_defaults(func=bench_record)
+
+    scrapers = subparsers.add_parser('scrapers', help='replay fixtures and check for regressions')
+    scrapers.add_argument('--site', action='append', choices=[a.name for a in site_registry.all()])
+    scrapers.add_argument('--browser', action='store_true', help='replay through headless Chrome')
+    scrapers.add_argument('--no-block', action='store_true',
+                          help='with --browser, load every resource to compare against blocking')
+    scrapers.add_argument('--repeat', type=int, default=20, help='parse-mode iterations per fixture')
+    scrapers.add_argument('--tolerance', type=float, default=0.1,
+                          help='allowed drop in products (fraction) and fill rate (absolute)')
+    scrapers.add_argument('--slowdown', type=float, default=1.5, help='allowed time ratio against baseline')
+    scrapers.add_argument('--update-baseline', action='store_true')
+    scrapers.set_defaults(func=bench_scrapers)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""Gunicorn settings: `gunicorn app:app` from this directory picks them up automatically."""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))  # scrapes and SSE streams outlive the 30 s default
+
+
+def post_fork(server, worker):
+    # Each worker process owns its own driver pool; fill it before the first request arrives
+    from app import warm_driver_pool
+    warm_driver_pool()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Keep the app off disk and free of background threads while it's imported for tests
+os.environ.setdefault('HISTORY_ENABLED', '0')
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+os.environ.setdefault('PREWARM_ENABLED', '0')
+os.environ.setdefault('SCRAPE_BACKEND', 'local')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from app import MemoryCacheBackend, Prewarmer, QueryTracker, ResultCache, SearchTimeout, SingleFlight
+
+
+def result(*prices):
+    return {'products': [{'title': f'Item {p}', 'price_num': p, 'source': 'Amazon'} for p in prices],
+            'sites': {}, 'timings': [{'span': 'scrape'}]}
+
+
+def make_cache(ttl=60, stale_ttl=60, timeout=5):
+    return ResultCache(MemoryCacheBackend(), ttl=ttl, stale_ttl=stale_ttl, flights=SingleFlight(timeout=timeout))
+
+
+def test_miss_then_hit():
+    cache = make_cache()
+    calls = []
+    compute = lambda: calls.append(1) or result(10)
+    
+    value, status, _ = cache.get_or_compute('tv', compute)
+    assert status == 'miss'
+    assert [p['price_num'] for p in value['products']] == [10]
+    
+    value, status, _ = cache.get_or_compute('tv', compute)
+    assert status == 'hit'
+    assert 'timings' not in value
+    assert len(calls) == 1
+
+
+def test_empty_results_are_not_cached():
+    cache = make_cache()
+    cache.get_or_compute('tv', lambda: result())
+    assert cache.backend.get('tv') is None
+
+
+def test_stale_entry_served_while_one_refresh_runs():
+    cache = make_cache(ttl=0.05)
+    cache.get_or_compute('tv', lambda: result(10))
+    time.sleep(0.1)
+    
+    release = threading.Event()
+    refreshes = []
+    def slow_refresh():
+        refreshes.append(1)
+        release.wait(2)
+        return result(8)
+    
+    for _ in range(3):
+        value, status, _ = cache.get_or_compute('tv', slow_refresh)
+        assert status == 'stale'
+        assert value['products'][0]['price_num'] == 10
+    release.set()
+    
+    for _ in range(50):
+        if cache.backend.get('tv')[0]['products'][0]['price_num'] == 8:
+            break
+        time.sleep(0.02)
+    assert cache.backend.get('tv')[0]['products'][0]['price_num'] == 8
+    assert len(refreshes) == 1
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight(timeout=5)
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'done'
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.run('tv', compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ['done'] * 5
+    assert len(calls) == 1
+    assert flights.in_flight() == 0
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight(timeout=5)
+    def compute():
+        raise RuntimeError('blocked')
+    
+    with pytest.raises(RuntimeError, match='blocked'):
+        flights.run('tv', compute)
+    assert flights.in_flight() == 0
+
+
+def test_timed_out_search_is_still_cached():
+    cache = make_cache(timeout=0.1)
+    finished = threading.Event()
+    def slow_scrape():
+        time.sleep(0.3)
+        finished.set()
+        return result(10)
+    
+    with pytest.raises(SearchTimeout):
+        cache.get_or_compute('tv', slow_scrape)
+    assert finished.wait(2)
+    time.sleep(0.05)
+    
+    value, status, _ = cache.get_or_compute('tv', lambda: pytest.fail('should be served from the cache'))
+    assert status == 'hit'
+    assert value['products'][0]['price_num'] == 10
+
+
+def test_miss_reports_the_stored_at_it_cached_with():
+    cache = make_cache()
+    _, status, cached_at = cache.get_or_compute('tv', lambda: result(10))
+    assert status == 'miss'
+    assert cached_at == cache.backend.get('tv')[1]
+
+
+def test_prewarm_checks_for_live_traffic_when_each_run_starts():
+    tracker = QueryTracker()
+    for query in ('tv', 'tv', 'phone'):
+        tracker.record(query)
+    busy = threading.Event()
+    warmed = []
+    def refresh(key, query):
+        warmed.append(query)
+        time.sleep(0.05)
+        busy.set()  # live searches arrive while the first pre-warm runs
+        return result(100)
+    prewarmer = Prewarmer(tracker, make_cache(), refresh, is_busy=busy.is_set, concurrency=1, rate=0)
+    
+    assert prewarmer.run_once() == 1
+    assert warmed == ['tv']
+    assert prewarmer.counts['deferred'] == 1
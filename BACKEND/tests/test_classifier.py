@@ -0,0 +1,22 @@
+import pytest
+
+from app import product_classifier
+from benchmark import legacy_is_relevant
+
+
+@pytest.mark.parametrize('query', ['smartphone', 'iphone15', 'iphone 15', 'samsung galaxy s24', 'redmi mobile'])
+@pytest.mark.parametrize('title', [
+    'Smartphone back cover case',
+    'Apple iPhone 15 (Black, 128 GB)',
+    'iPhone15 tempered glass screen guard',
+    'Samsung Galaxy S24 5G silicone case',
+    'Redmi 13C mobile phone pouch',
+])
+def test_device_queries_match_legacy_relevance(query, title):
+    assert product_classifier.is_relevant(title, query) == legacy_is_relevant(title, query)
+
+
+def test_accessories_are_dropped_for_device_queries():
+    assert not product_classifier.is_relevant('Smartphone back cover case', 'smartphone')
+    assert not product_classifier.is_relevant('iPhone15 back case', 'iphone15')
+    assert product_classifier.is_relevant('Leather laptop case', 'laptop case')
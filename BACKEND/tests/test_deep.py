@@ -0,0 +1,84 @@
+import threading
+import time
+
+import app
+from app import UniversalEcommerceScraper, first_page_state, merge_cached_products, site_registry
+
+
+def page_of(price, count=5):
+    return [{'title': f'Apple iPhone 15 listing {price}-{i}', 'price': f'₹{price + i}', 'price_num': price + i,
+             'rating': 'N/A', 'category': 'Mobile Phones', 'source': 'Flipkart', 'url': f'https://www.flipkart.com/p/{price + i}',
+             'image': 'N/A'} for i in range(count)]
+
+
+def scraper_with(pages):
+    """Scraper whose pages come from pages[number]: a product list, or a callable returning one"""
+    scraper = UniversalEcommerceScraper()
+    fetched = []
+    def scrape_site(adapter, query, budget=None, page=1):
+        fetched.append(page)
+        found = pages.get(page, [])
+        return (found() if callable(found) else found), 'http'
+    scraper.scrape_site = scrape_site
+    return scraper, fetched
+
+
+def test_card_cap_moves_cursor_past_the_whole_batch(monkeypatch):
+    monkeypatch.setattr(app, 'DEEP_MAX_CARDS', 6)
+    adapter = site_registry.select(['Flipkart'])[0]
+    scraper, fetched = scraper_with({n: page_of(1000 - n * 100) for n in range(2, 10)})
+    
+    products, next_page, _ = scraper.scrape_pages(adapter, 'iphone 15', 2, 8)
+    batch = list(range(2, 2 + adapter.parallel_pages))
+    assert sorted(fetched) == batch
+    assert len(products) == 5 * len(batch)
+    assert next_page == batch[-1] + 1
+
+
+def test_early_stop_does_not_wait_for_the_rest_of_the_batch():
+    adapter = site_registry.select(['Flipkart'])[0]
+    release = threading.Event()
+    def slow_page():
+        release.wait(2)
+        return page_of(10)
+    scraper, _ = scraper_with({2: page_of(5000), 3: slow_page, 4: slow_page})
+    
+    started = time.monotonic()
+    products, next_page, _ = scraper.scrape_pages(adapter, 'iphone 15', 2, 3, top_prices=[100] * app.DEEP_TOP_K)
+    release.set()
+    assert time.monotonic() - started < 1
+    assert next_page is None
+    assert len(products) == 5
+
+
+def test_failed_page_stays_in_the_cursor():
+    adapter = site_registry.select(['Flipkart'])[0]
+    def busy():
+        raise app.DriverPoolExhausted('no free browser')
+    scraper, _ = scraper_with({2: page_of(900), 3: busy})
+    
+    products, next_page, _ = scraper.scrape_pages(adapter, 'iphone 15', 2, 2)
+    assert len(products) == 5
+    assert next_page == 3
+
+
+def test_merged_pages_are_not_offered_again(monkeypatch):
+    adapter = site_registry.select(['Flipkart'])[0]
+    result = {'products': page_of(500), 'sites': {'Flipkart': {'status': 'ok'}}, 'groups': []}
+    key = 'iphone 15|deep-test'
+    app.result_cache.backend.set(key, result, time.time())
+    try:
+        state = first_page_state(result)
+        assert state['Flipkart']['page'] == 2
+        
+        merge_cached_products(key, page_of(100), {'Flipkart': state['Flipkart']}, {'Flipkart': {'page': 5, 'top': [100]}})
+        cached, _ = app.result_cache.backend.get(key)
+        assert len(cached['products']) == 10
+        assert first_page_state(cached)['Flipkart']['page'] == 5
+        
+        # The site ran out of pages
+        merge_cached_products(key, [], {'Flipkart': {'page': 5}}, {})
+        cached, _ = app.result_cache.backend.get(key)
+        assert 'Flipkart' not in first_page_state(cached)
+    finally:
+        app.result_cache.backend.delete(key)
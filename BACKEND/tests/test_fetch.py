@@ -0,0 +1,39 @@
+import app
+from app import UniversalEcommerceScraper, site_registry
+
+CARD = ('<div data-component-type="s-search-result"><h2><a href="/dp/B{n:03d}"><span>{title}</span></a></h2>'
+        '<span class="a-price"><span class="a-offscreen">₹{price}</span></span></div>')
+
+
+class FakeResponse:
+    status_code = 200
+    
+    def __init__(self, text):
+        self.text = text
+
+
+def serve(monkeypatch, titles):
+    html = '<html><body>' + ''.join(CARD.format(n=n, title=title, price=1000 + n) for n, title in enumerate(titles))
+    monkeypatch.setattr(app.http_session, 'get', lambda url, timeout=None: FakeResponse(html + '</body></html>'))
+
+
+def no_browser(self, *args, **kwargs):
+    raise AssertionError('the browser should not be used')
+
+
+def test_narrow_query_on_a_parsed_page_stays_on_http(monkeypatch):
+    adapter = site_registry.select(['Amazon'])[0]
+    titles = ['Apple iPhone 15 (128 GB)', 'Apple iPhone 15 (256 GB)'] + [f'Boat Airdopes {n}' for n in range(18)]
+    serve(monkeypatch, titles)
+    monkeypatch.setattr(UniversalEcommerceScraper, 'create_driver', no_browser)
+    monkeypatch.setattr(UniversalEcommerceScraper, 'scrape_adapter', no_browser)
+    
+    products, fetch = UniversalEcommerceScraper().scrape_site(adapter, 'iphone 15')
+    assert fetch == 'http'
+    assert len(products) == 2
+
+
+def test_page_without_cards_falls_back_to_the_browser(monkeypatch):
+    adapter = site_registry.select(['Amazon'])[0]
+    serve(monkeypatch, ['Apple iPhone 15 (128 GB)'])
+    assert UniversalEcommerceScraper().fetch_static(adapter, 'iphone 15') is None
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from app import JobQueue, JobQueueFull
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail('condition never became true')
+        time.sleep(0.01)
+
+
+def test_cancelled_jobs_free_their_queue_slot():
+    release = threading.Event()
+    jobs = JobQueue(lambda job: release.wait(2), workers=1, max_depth=1)
+    try:
+        running = jobs.submit('tv')
+        wait_for(lambda: running.status == 'running')
+        
+        waiting = jobs.submit('phone')
+        with pytest.raises(JobQueueFull):
+            jobs.submit('laptop')
+        
+        jobs.cancel(waiting.id)
+        assert waiting.status == 'cancelled'
+        assert jobs.stats()['queued'] == 0
+        replacement = jobs.submit('laptop')
+        assert jobs.stats()['queued'] == 1
+    finally:
+        release.set()
+    
+    wait_for(lambda: replacement.status == 'done')
+    assert waiting.started_at is None
+    assert jobs.stats()['queued'] == 0
+
+
+def test_streams_and_jobs_share_one_scrape(monkeypatch):
+    import app
+    from test_deep import page_of
+    
+    release = threading.Event()
+    scrapes = []
+    def iter_sites(self, query, sites=None):
+        scrapes.append(query)
+        self.site_reports['Flipkart'] = {'status': 'ok'}
+        yield 'Flipkart', page_of(500), self.site_reports['Flipkart']
+        release.wait(2)
+    monkeypatch.setattr(app.UniversalEcommerceScraper, 'iter_sites', iter_sites)
+    
+    query = 'iphone 15 shared-scrape'
+    stream = app.stream_search(query)
+    next(stream)  # opening progress event
+    first_site = next(stream)
+    assert 'Flipkart' in first_site
+    
+    job = app.SearchJob(query)
+    runner = threading.Thread(target=app.run_job, args=(job,))
+    runner.start()
+    wait_for(lambda: job.products)
+    release.set()
+    events = list(stream)
+    runner.join(2)
+    
+    assert scrapes == [query]
+    assert any(event.startswith('event: summary') for event in events)
+    assert len(job.products) == 5
+    assert app.result_cache.peek(app.search_key(query)) is not None
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+import app
+from app import ResultIndex
+
+
+def product(price, source='Amazon', category='Mobile Phones'):
+    return {'title': f'Apple iPhone 15 {source} {price}', 'price': f'₹{price}', 'price_num': price, 'rating': 'N/A',
+            'category': category, 'source': source, 'url': f'https://example.com/{source}/{price}', 'image': 'N/A'}
+
+
+def reference(products, source=None, category=None, min_price=None, max_price=None, sort='price-asc'):
+    matching = [p for p in products
+                if (source is None or p['source'] == source) and (category is None or p['category'] == category)
+                and (min_price is None or p['price_num'] >= min_price)
+                and (max_price is None or p['price_num'] <= max_price)]
+    return sorted(matching, key=lambda p: p['price_num'], reverse=sort == 'price-desc')
+
+
+def test_index_matches_a_plain_filter():
+    rng = random.Random(7)
+    products = sorted((product(rng.randint(100, 100000), rng.choice(['Amazon', 'Flipkart', 'JioMart']),
+                               rng.choice(['Mobile Phones', 'Audio', 'Laptops'])) for _ in range(500)),
+                      key=lambda p: p['price_num'])
+    index = ResultIndex(products)
+    for _ in range(50):
+        view = {
+            'source': rng.choice([None, 'Amazon', 'Flipkart']),
+            'category': rng.choice([None, 'Audio', 'Laptops']),
+            'min_price': rng.choice([None, 5000]),
+            'max_price': rng.choice([None, 60000]),
+            'sort': rng.choice(['price-asc', 'price-desc']),
+        }
+        expected = reference(products, **view)
+        page, total, _ = index.query(**view, page=2, limit=10)
+        assert total == len(expected)
+        assert [p['price_num'] for p in page] == [p['price_num'] for p in expected[10:20]]
+
+
+def test_facets_count_every_match():
+    index = ResultIndex([product(100), product(200, 'Flipkart'), product(300, 'Flipkart', 'Audio')])
+    _, total, facets = index.query(source='Flipkart')
+    assert total == 2
+    assert facets['source'] == {'Amazon': 1, 'Flipkart': 2}
+    assert facets['category'] == {'Mobile Phones': 1, 'Audio': 1}
+    assert facets['price'] == {'min': 100, 'max': 300}  # the whole result set's range, for the slider
+
+
+@pytest.fixture
+def client(monkeypatch):
+    scraped = [product(69000), product(70000, 'Flipkart'), product(72000, 'Flipkart')]
+    monkeypatch.setattr(app, 'run_search', lambda query, sites=None: {
+        'products': list(scraped),
+        'sites': {'Amazon': {'status': 'ok'}, 'Flipkart': {'status': 'ok'}},
+        'groups': [],
+    })
+    monkeypatch.setattr(app.UniversalEcommerceScraper, 'deep_scrape',
+                        lambda self, query, state, max_pages: ([product(100)], {}, {'Amazon': {'products': 1}}))
+    monkeypatch.setattr(app, 'track_query', lambda query: None)
+    app.app.config['TESTING'] = True
+    yield app.app.test_client()
+    app.result_cache.backend.delete(app.search_key('views regression phone'))
+
+
+def test_filtered_view_includes_products_loaded_with_more(client):
+    query = 'views regression phone'
+    client.post('/api/search', json={'query': query})
+    # Served from the cache, so this view's index is the one kept for the cached entry
+    first = client.post('/api/search', json={'query': query, 'source': 'Amazon', 'page': 1, 'limit': 24}).get_json()
+    assert first['cache']['status'] == 'hit'
+    assert [p['price_num'] for p in first['products']] == [69000]
+    assert first['next_cursor']
+    
+    more = client.get('/api/search/more', query_string={'cursor': first['next_cursor']}).get_json()
+    assert [p['price_num'] for p in more['products']] == [100]
+    
+    view = client.post('/api/search', json={'query': query, 'source': 'Amazon', 'page': 1, 'limit': 24}).get_json()
+    assert [p['price_num'] for p in view['products']] == [100, 69000]
+    assert view['facets']['source']['Amazon'] == 2
+    
+    full = client.post('/api/search', json={'query': query}).get_json()
+    assert full['total_products'] == 4
+    assert full['facets']['price']['min'] == 100
+
+
+def test_more_merges_into_the_site_scoped_search(client):
+    query = 'views regression phone'
+    sites = app.site_registry.select(['Amazon'])
+    try:
+        first = client.post('/api/search', json={'query': query, 'sites': ['Amazon']}).get_json()
+        assert first['next_cursor']
+        
+        client.get('/api/search/more', query_string={'cursor': first['next_cursor']})
+        scoped = client.post('/api/search', json={'query': query, 'sites': ['Amazon']}).get_json()
+        assert scoped['total_products'] == 4
+        assert app.result_cache.peek(app.search_key(query)) is None
+    finally:
+        app.result_cache.backend.delete(app.search_key(query, sites))
+
+
+def test_non_string_filters_are_rejected(client):
+    for name in ('source', 'category', 'sort'):
+        response = client.post('/api/search', json={'query': 'views regression phone', name: ['Amazon']})
+        assert response.status_code == 400
+        assert name in response.get_json()['error']
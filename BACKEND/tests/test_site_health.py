@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app import SiteHealth, UniversalEcommerceScraper, site_registry
+
+
+def open_circuit(health, site='Amazon'):
+    for _ in range(health.threshold):
+        health.record(site, 'empty')
+    assert health.stats()[site]['state'] == 'open'
+
+
+def test_breaker_opens_after_consecutive_failures():
+    health = SiteHealth(threshold=3, cooldown=60)
+    health.record('Amazon', 'empty')
+    health.record('Amazon', 'error')
+    assert health.allow('Amazon')
+    health.record('Amazon', 'timeout')
+    assert not health.allow('Amazon')
+    assert health.stats()['Amazon']['consecutive_failures'] == 3
+
+
+def test_success_resets_failure_count():
+    health = SiteHealth(threshold=2, cooldown=60)
+    health.record('Amazon', 'empty')
+    health.record('Amazon', 'ok', 1.0, 'http')
+    health.record('Amazon', 'empty')
+    assert health.stats()['Amazon']['state'] == 'closed'
+
+
+def test_one_probe_after_cooldown_then_recovery():
+    health = SiteHealth(threshold=2, cooldown=0.05)
+    open_circuit(health)
+    assert not health.allow('Amazon')
+    time.sleep(0.06)
+    
+    assert health.allow('Amazon')
+    assert health.stats()['Amazon']['state'] == 'half_open'
+    assert not health.allow('Amazon')
+    
+    health.record('Amazon', 'ok', 2.0, 'browser')
+    assert health.stats()['Amazon']['state'] == 'closed'
+    assert health.allow('Amazon')
+
+
+def test_failed_probe_reopens_circuit():
+    health = SiteHealth(threshold=2, cooldown=0.05)
+    open_circuit(health)
+    time.sleep(0.06)
+    assert health.allow('Amazon')
+    health.record('Amazon', 'empty')
+    assert health.stats()['Amazon']['state'] == 'open'
+    assert not health.allow('Amazon')
+
+
+def test_budget_tightens_from_browser_durations():
+    health = SiteHealth(threshold=3, cooldown=60)
+    adapter = site_registry.select(['Amazon'])[0]
+    assert health.budget(adapter) == adapter.timeout
+    for _ in range(10):
+        health.record('Amazon', 'ok', 0.5, 'http')
+    assert health.budget(adapter) == adapter.timeout
+    for _ in range(10):
+        health.record('Amazon', 'ok', 2.0, 'browser')
+    assert health.budget(adapter) < adapter.timeout
+
+
+def test_abandoned_probe_is_released():
+    health = SiteHealth(threshold=2, cooldown=0.05)
+    open_circuit(health)
+    time.sleep(0.06)
+    
+    release = threading.Event()
+    scraper = UniversalEcommerceScraper(site_health=health)
+    def scrape(adapter, query, budget=None, page=1):
+        if adapter.name == 'Amazon':
+            release.wait(2)
+        return [{'title': 'Apple iPhone 15', 'price_num': 69900}], 'http'
+    scraper.scrape_site = scrape
+    
+    # The client goes away after the first site, as an SSE disconnect or job cancel would
+    sites = scraper.iter_sites('iphone 15', site_registry.select(['Amazon', 'Flipkart']))
+    assert next(sites)[0] == 'Flipkart'
+    assert not health.allow('Amazon')
+    sites.close()
+    release.set()
+    
+    assert health.stats()['Amazon']['state'] == 'half_open'
+    assert health.allow('Amazon')
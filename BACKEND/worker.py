@@ -0,0 +1,82 @@
+"""Scraper worker process.
+
+Usage:
+    SCRAPE_BACKEND=workers python app.py     # API tier, never launches a browser
+    python worker.py [--capacity 4] [--warm]  # run one or more per host
+
+Each worker registers its capacity in the shared worker database (WORKER_DB_PATH), heartbeats,
+and runs the site scrapes the API's least-loaded scheduler assigns to it on its own pool of
+Chrome drivers. Stopping a worker hands its unstarted scrapes to the remaining workers.
+"""
+import argparse
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app import (DRIVER_POOL_SIZE, WORKER_DB_PATH, WORKER_HEARTBEAT, WORKER_POLL_INTERVAL, DriverPool,
+                 DriverPoolExhausted, UniversalEcommerceScraper, WorkerBroker, logger, site_registry)
+
+
+def run_task(broker, driver_pool, task):
+    """Scrape one assigned site page and report the outcome back to the broker"""
+    try:
+        adapter = site_registry.select([task['site']])[0]
+        scraper = UniversalEcommerceScraper(driver_pool=driver_pool)
+        products, fetch = scraper.scrape_site(adapter, task['query'], task['budget'], task['page'])
+        broker.finish(task['id'], 'done', {'products': products, 'fetch': fetch})
+    except DriverPoolExhausted as e:
+        broker.finish(task['id'], 'busy', error=str(e))
+    except Exception as e:
+        logger.error(f"❌ Task {task['id']} ({task['site']}: {task['query']}) failed: {e}")
+        broker.finish(task['id'], 'failed', error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacity', type=int, default=DRIVER_POOL_SIZE, help='concurrent scrapes (and browsers)')
+    parser.add_argument('--db', default=WORKER_DB_PATH, help='shared worker database')
+    parser.add_argument('--warm', action='store_true', help='launch every browser before taking work')
+    args = parser.parse_args()
+
+    capacity = max(1, args.capacity)
+    driver_pool = DriverPool(lambda: UniversalEcommerceScraper().create_driver(), size=capacity)
+    if args.warm:
+        driver_pool.warm()
+
+    broker = WorkerBroker(args.db)
+    worker_id = broker.register(capacity)
+    logger.info(f"🧵 Scraper worker {worker_id} ready with capacity {capacity}")
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    executor = ThreadPoolExecutor(max_workers=capacity, thread_name_prefix='scrape')
+    in_flight = set()
+    last_heartbeat = time.monotonic()
+    try:
+        while not stopping.is_set():
+            if time.monotonic() - last_heartbeat >= WORKER_HEARTBEAT:
+                broker.heartbeat(worker_id)
+                last_heartbeat = time.monotonic()
+
+            in_flight = {future for future in in_flight if not future.done()}
+            tasks = broker.claim(worker_id, capacity - len(in_flight)) if len(in_flight) < capacity else []
+            for task in tasks:
+                in_flight.add(executor.submit(run_task, broker, driver_pool, task))
+            if not tasks:
+                stopping.wait(WORKER_POLL_INTERVAL)
+    finally:
+        logger.info(f"🛑 Scraper worker {worker_id} draining {len(in_flight)} running scrapes")
+        broker.drain(worker_id)
+        # Keep heartbeating so the API doesn't presume the running scrapes lost
+        while wait(in_flight, timeout=WORKER_HEARTBEAT).not_done:
+            broker.heartbeat(worker_id)
+        executor.shutdown()
+        broker.deregister(worker_id)
+        driver_pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Search, TrendingUp, ShoppingCart, ExternalLink, Star, Filter, AlertCircle, Award, CheckCircle, Info } from 'lucide-react';
 
 const API_URL = 'http://localhost:5000';
+const PAGE_SIZE = 24;
 
 const PriceComparisonApp = () => {
   const [searchQuery, setSearchQuery] = useState('');
@@ -11,8 +12,54 @@ const PriceComparisonApp = () => {
   const [selectedSource, setSelectedSource] = useState('all');
   const [sortBy, setSortBy] = useState('price-asc');
   const [selectedCategory, setSelectedCategory] = useState('all');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [activeQuery, setActiveQuery] = useState(null);
+  const [facets, setFacets] = useState(null);
+  const [totalMatching, setTotalMatching] = useState(0);
+  const [page, setPage] = useState(1);
+  const [viewVersion, setViewVersion] = useState(0);
 
-  const handleSearch = async () => {
+  // Once a search has finished, the server filters, sorts and pages its cached results
+  useEffect(() => {
+    if (!activeQuery || loading) return undefined;
+    let cancelled = false;
+
+    fetch(`${API_URL}/api/search`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        query: activeQuery,
+        source: selectedSource,
+        category: selectedCategory,
+        sort: sortBy,
+        page,
+        limit: PAGE_SIZE
+      })
+    })
+      .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+      .then(({ ok, data }) => {
+        if (cancelled) return;
+        if (!ok || !data.success) {
+          setError(data.error || 'Failed to fetch products');
+          return;
+        }
+        setProducts(data.products);
+        setFacets(data.facets);
+        setTotalMatching(data.total_products);
+      })
+      .catch((err) => {
+        if (cancelled) return;
+        console.error('Error:', err);
+        setError('Failed to connect to server. Make sure the backend is running on http://localhost:5000');
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [activeQuery, loading, selectedSource, selectedCategory, sortBy, page, viewVersion]);
+
+  const handleSearch = () => {
     if (!searchQuery.trim()) {
       setError('Please enter a search query');
       return;
@@ -21,31 +68,64 @@ const PriceComparisonApp = () => {
     setLoading(true);
     setError(null);
     setProducts([]);
+    setNextCursor(null);
+    setActiveQuery(null);
+    setFacets(null);
+    setSelectedSource('all');
+    setSelectedCategory('all');
+    setPage(1);
 
-    try {
-      const response = await fetch(`${API_URL}/api/search`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ query: searchQuery })
-      });
+    // Each platform's products arrive as soon as that platform finishes
+    const source = new EventSource(`${API_URL}/api/search/stream?q=${encodeURIComponent(searchQuery)}`);
 
-      const data = await response.json();
+    source.addEventListener('site', (e) => {
+      const data = JSON.parse(e.data);
+      setProducts((prev) => [...prev, ...data.products].sort((a, b) => a.price_num - b.price_num));
+    });
 
-      if (data.success) {
-        setProducts(data.products);
-        if (data.products.length === 0) {
-          setError('No products found. Try a different search term.');
-        }
+    source.addEventListener('summary', (e) => {
+      const data = JSON.parse(e.data);
+      source.close();
+      setProducts(data.products);
+      setNextCursor(data.next_cursor || null);
+      if (data.products.length === 0) {
+        setError('No products found. Try a different search term.');
       } else {
-        setError(data.error || 'Failed to fetch products');
+        setActiveQuery(data.query);
       }
+      setLoading(false);
+    });
+
+    source.addEventListener('error', (e) => {
+      source.close();
+      if (e.data) {
+        setError(JSON.parse(e.data).error || 'Failed to fetch products');
+      } else {
+        console.error('Error:', e);
+        setError('Failed to connect to server. Make sure the backend is running on http://localhost:5000');
+      }
+      setLoading(false);
+    });
+  };
+
+  // Further result pages, continuing from where the last response left off
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await fetch(`${API_URL}/api/search/more?cursor=${encodeURIComponent(nextCursor)}`);
+      const data = await response.json();
+      if (!response.ok) {
+        setError(data.error || 'Failed to load more products');
+        return;
+      }
+      setNextCursor(data.next_cursor || null);
+      // The server adds the new pages to the cached results, so reload the current view
+      setViewVersion((version) => version + 1);
     } catch (err) {
       console.error('Error:', err);
       setError('Failed to connect to server. Make sure the backend is running on http://localhost:5000');
     } finally {
-      setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -65,18 +145,15 @@ const PriceComparisonApp = () => {
     return icons[source] || '🛍️';
   };
 
-  const filteredProducts = products
-    .filter(p => selectedSource === 'all' || p.source === selectedSource)
-    .filter(p => selectedCategory === 'all' || p.category === selectedCategory)
-    .sort((a, b) => {
-      if (sortBy === 'price-asc') return a.price_num - b.price_num;
-      if (sortBy === 'price-desc') return b.price_num - a.price_num;
-      return 0;
-    });
-
-  const categories = [...new Set(products.map(p => p.category))];
-  const sources = [...new Set(products.map(p => p.source))];
-  const bestDeal = filteredProducts.length > 0 ? filteredProducts[0] : null;
+  // While results stream in, count what has arrived; afterwards use the server's facets
+  const countBy = (field) => products.reduce((counts, p) => ({ ...counts, [p[field]]: (counts[p[field]] || 0) + 1 }), {});
+  const sourceCounts = facets ? facets.source : countBy('source');
+  const categoryCounts = facets ? facets.category : countBy('category');
+  const sources = Object.keys(sourceCounts);
+  const categories = Object.keys(categoryCounts);
+  const totalSources = Object.values(sourceCounts).reduce((sum, count) => sum + count, 0);
+  const totalPages = Math.ceil(totalMatching / PAGE_SIZE);
+  const bestDeal = products.length > 0 && sortBy === 'price-asc' && page === 1 ? products[0] : null;
 
   return (
   <div className="min-h-screen bg-gray-50 text-gray-900">
@@ -133,19 +210,22 @@ const PriceComparisonApp = () => {
       )}
 
       {/* Filters */}
-      {products.length > 0 && !loading && (
+      {products.length > 0 && (
         <div className="grid sm:grid-cols-3 gap-4 mb-6">
           <div>
             <label className="block text-sm font-semibold mb-1">Source</label>
             <select
               value={selectedSource}
-              onChange={(e) => setSelectedSource(e.target.value)}
+              onChange={(e) => {
+                setSelectedSource(e.target.value);
+                setPage(1);
+              }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:border-blue-500 focus:outline-none text-sm"
             >
-              <option value="all">All Sources ({products.length})</option>
+              <option value="all">All Sources ({totalSources})</option>
               {sources.map((source) => (
                 <option key={source} value={source}>
-                  {getSourceIcon(source)} {source} ({products.filter((p) => p.source === source).length})
+                  {getSourceIcon(source)} {source} ({sourceCounts[source]})
                 </option>
               ))}
             </select>
@@ -155,13 +235,16 @@ const PriceComparisonApp = () => {
             <label className="block text-sm font-semibold mb-1">Category</label>
             <select
               value={selectedCategory}
-              onChange={(e) => setSelectedCategory(e.target.value)}
+              onChange={(e) => {
+                setSelectedCategory(e.target.value);
+                setPage(1);
+              }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:border-blue-500 focus:outline-none text-sm"
             >
               <option value="all">All Categories</option>
               {categories.map((cat) => (
                 <option key={cat} value={cat}>
-                  {cat}
+                  {cat} ({categoryCounts[cat]})
                 </option>
               ))}
             </select>
@@ -171,7 +254,10 @@ const PriceComparisonApp = () => {
             <label className="block text-sm font-semibold mb-1">Sort By</label>
             <select
               value={sortBy}
-              onChange={(e) => setSortBy(e.target.value)}
+              onChange={(e) => {
+                setSortBy(e.target.value);
+                setPage(1);
+              }}
               className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:border-blue-500 focus:outline-none text-sm"
             >
               <option value="price-asc">Price: Low to High</option>
@@ -183,16 +269,16 @@ const PriceComparisonApp = () => {
 
       {/* Loading State */}
       {loading && (
-        <div className="text-center text-gray-600">
+        <div className="text-center text-gray-600 mb-6">
           <p>Searching across platforms...</p>
-          <p>This may take a few seconds</p>
+          <p>Results appear as each platform responds</p>
         </div>
       )}
 
       {/* Products Grid */}
-      {!loading && filteredProducts.length > 0 && (
+      {products.length > 0 && (
         <div className="grid sm:grid-cols-2 md:grid-cols-3 gap-4">
-          {filteredProducts.map((product, index) => (
+          {products.map((product, index) => (
             <div key={index} className="bg-white rounded-lg shadow p-3 flex flex-col items-start gap-2">
               {product.image && (
                 <img
@@ -216,6 +302,42 @@ const PriceComparisonApp = () => {
         </div>
       )}
 
+      {/* Pagination */}
+      {activeQuery && !loading && totalPages > 1 && (
+        <div className="flex justify-center items-center gap-4 mt-6">
+          <button
+            onClick={() => setPage(page - 1)}
+            disabled={page <= 1}
+            className="px-3 py-2 border border-gray-300 rounded-lg disabled:text-gray-400"
+          >
+            Previous
+          </button>
+          <span className="text-sm text-gray-600">
+            Page {page} of {totalPages} ({totalMatching} products)
+          </span>
+          <button
+            onClick={() => setPage(page + 1)}
+            disabled={page >= totalPages}
+            className="px-3 py-2 border border-gray-300 rounded-lg disabled:text-gray-400"
+          >
+            Next
+          </button>
+        </div>
+      )}
+
+      {/* Load More */}
+      {nextCursor && !loading && (
+        <div className="text-center mt-6">
+          <button
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="px-4 py-3 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:bg-gray-400"
+          >
+            {loadingMore ? 'Loading more results...' : 'Load more results'}
+          </button>
+        </div>
+      )}
+
       {/* Empty State */}
       {!loading && !error && products.length === 0 && (
         <div className="text-center text-gray-600 mt-10">